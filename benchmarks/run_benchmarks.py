@@ -0,0 +1,347 @@
+import argparse
+import contextlib
+import fnmatch
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.fast_core import NUMBA_AVAILABLE, simulate_action_table
+from src.agents.rlom import RLOrderingMechanism
+from src.agents.one_for_one import OneForOnePolicy
+from src.agents.ga_based import GABasedPolicy
+from src.agents.dqn import DQNPolicy
+from src.agents.dp_planner import DynamicProgrammingPlanner
+from src.utils.evaluation import evaluate_scenarios
+from src.utils.sweep import generate_scenario
+
+# Scenario used for every horizon: Poisson(10) demand and lead times 0..4, like the default game
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2,
+}
+
+# Policies of src/agents, evaluated untrained: the benchmark measures speed, not cost
+POLICIES = {
+    "1-for-1": OneForOnePolicy,
+    "GA-Based": GABasedPolicy,
+    "RLOM": RLOrderingMechanism,
+    "DQN": DQNPolicy,
+    "DP": DynamicProgrammingPlanner,
+}
+
+# Every measurement repeats its benchmark until this much wall time has passed, so timer
+# resolution and one-off hiccups do not dominate short runs
+MIN_SECONDS = 0.3
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def scenario(horizon, seed=0):
+    return generate_scenario(dict(SCENARIO_PARAMS, time_horizon=horizon), seed)
+
+
+# Each bench_* function builds its inputs and returns (units, run): run() does the timed work,
+# units counts what one call of run() processes
+
+
+def bench_env_step(horizon):
+    env = SupplyChainEnvironment(**scenario(horizon))
+
+    def run():
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step([1, 1, 1, 1])
+    return horizon, run
+
+
+def bench_batch_env_step(horizon, num_envs):
+    kwargs = [scenario(horizon, seed) for seed in range(num_envs)]
+    env = BatchSupplyChainEnvironment(
+        num_envs,
+        customer_demand=[k["customer_demand"] for k in kwargs],
+        lead_times=[k["lead_times"] for k in kwargs],
+        time_horizon=horizon,
+    )
+    actions = np.ones((num_envs, 4), dtype=np.int64)
+
+    def run():
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step(actions)
+    return horizon * num_envs, run
+
+
+def bench_rlom_train(horizon, dense=False):
+    # A fresh agent per call, so every call explores on the same schedule
+    env = SupplyChainEnvironment(**scenario(horizon))
+    episodes = max(1, 2000 // horizon)
+
+    def run():
+        agent = RLOrderingMechanism(env, dense=dense)
+        agent.train(episodes=episodes, max_steps=horizon, verbose=False)
+    return episodes, run
+
+
+def bench_dp_plan(horizon, rounds=2):
+    # One exploration round and one refinement round, each solved over the full table
+    env = SupplyChainEnvironment(**scenario(horizon))
+    episodes = max(1, 200_000 // horizon)
+
+    def run():
+        planner = DynamicProgrammingPlanner(env, seed=0)
+        planner.plan(rounds=rounds, episodes_per_round=episodes, verbose=False)
+    return rounds, run
+
+
+def bench_dqn_learn(batch_size):
+    agent = DQNPolicy(SupplyChainEnvironment(), batch_size=batch_size)
+    # Random transitions: learn() cost does not depend on their content
+    n = max(batch_size, 1000)
+    agent.memory.add_batch(
+        np.random.randint(-20, 40, (n, 4)),
+        np.random.randint(0, 256, n),
+        -np.random.randint(0, 200, n),
+        np.random.randint(-20, 40, (n, 4)),
+        np.zeros(n, dtype=bool),
+    )
+    return 1, agent.learn
+
+
+def bench_evaluate(policy_name, horizon, num_scenarios):
+    policy = POLICIES[policy_name](SupplyChainEnvironment())
+    scenarios = [scenario(horizon, seed) for seed in range(num_scenarios)]
+    return horizon * num_scenarios, lambda: evaluate_scenarios(policy, scenarios)
+
+
+def random_action_table(seed=0):
+    n_states = SupplyChainEnvironment().n_state_codes ** 4
+    return np.random.default_rng(seed).integers(0, 4, (n_states, 4))
+
+
+def check_fast_core(horizon, num_scenarios, holding_cost=1, backlog_cost=2):
+    """
+    Asserts that simulate_action_table gives bit-identical period costs to playing the same
+    action table game by game in SupplyChainEnvironment.
+    """
+    table = random_action_table()
+    scenarios = [scenario(horizon, seed) for seed in range(num_scenarios)]
+    total_cost, period_costs = simulate_action_table(
+        table,
+        [k["customer_demand"] for k in scenarios],
+        [k["lead_times"] for k in scenarios],
+        holding_cost=holding_cost,
+        backlog_cost=backlog_cost,
+    )
+    for i, kwargs in enumerate(scenarios):
+        env = SupplyChainEnvironment(**dict(kwargs, holding_cost=holding_cost, backlog_cost=backlog_cost))
+        state = env.reset()
+        done = False
+        while not done:
+            state, _, done, _ = env.step(table[env.state_index(env.code_state(state))].tolist())
+        if total_cost[i] != env.total_cost or not np.array_equal(period_costs[i], env.period_costs):
+            raise AssertionError(f"fast core differs from SupplyChainEnvironment on scenario {i} (h={horizon})")
+
+
+def bench_fast_core(horizon, num_scenarios):
+    table = random_action_table()
+    scenarios = [scenario(horizon, seed) for seed in range(num_scenarios)]
+    demand = np.array([k["customer_demand"] for k in scenarios], dtype=np.int64)
+    lead_times = np.array([k["lead_times"] for k in scenarios], dtype=np.int64)
+    # The first call compiles the kernel
+    simulate_action_table(table, demand, lead_times)
+    return horizon * num_scenarios, lambda: simulate_action_table(table, demand, lead_times)
+
+
+def bench_compare_policies():
+    # Runs the whole experiment in a scratch directory so results/ is left alone
+    import compare_policies
+
+    def run():
+        cwd = os.getcwd()
+        argv = sys.argv
+        with tempfile.TemporaryDirectory() as scratch, open(os.devnull, "w") as devnull:
+            os.chdir(scratch)
+            sys.argv = ["compare_policies.py"]
+            try:
+                with contextlib.redirect_stdout(devnull):
+                    compare_policies.main()
+            finally:
+                os.chdir(cwd)
+                sys.argv = argv
+    return 1, run
+
+
+def build_benchmarks(horizons, batch_sizes, dqn_batch_sizes):
+    """
+    Returns (name, unit, function) for every benchmark. Names encode their parameters,
+    so results from runs with different settings can still be compared name by name.
+    """
+    benchmarks = []
+    for horizon in horizons:
+        benchmarks.append((f"env.step[h={horizon}]", "steps", lambda h=horizon: bench_env_step(h)))
+        for n in batch_sizes:
+            benchmarks.append((f"batch_env.step[h={horizon},n={n}]", "steps",
+                               lambda h=horizon, n=n: bench_batch_env_step(h, n)))
+        benchmarks.append((f"rlom.train[h={horizon}]", "episodes", lambda h=horizon: bench_rlom_train(h)))
+        benchmarks.append((f"rlom.train[h={horizon},dense]", "episodes",
+                           lambda h=horizon: bench_rlom_train(h, dense=True)))
+        benchmarks.append((f"dp.plan[h={horizon}]", "rounds", lambda h=horizon: bench_dp_plan(h)))
+        for n in batch_sizes:
+            benchmarks.append((f"fast_core.simulate[h={horizon},n={n}]", "steps",
+                               lambda h=horizon, n=n: bench_fast_core(h, n)))
+        for policy_name in POLICIES:
+            for n in batch_sizes:
+                benchmarks.append((f"evaluate.{policy_name}[h={horizon},n={n}]", "steps",
+                                   lambda p=policy_name, h=horizon, n=n: bench_evaluate(p, h, n)))
+    for batch_size in dqn_batch_sizes:
+        benchmarks.append((f"dqn.learn[batch={batch_size}]", "updates", lambda b=batch_size: bench_dqn_learn(b)))
+    benchmarks.append(("compare_policies.main", "runs", bench_compare_policies))
+    return benchmarks
+
+
+def measure(units, run, min_seconds=MIN_SECONDS):
+    # Calls run() until min_seconds have passed; returns (units processed, seconds).
+    # Garbage collection is paused like in timeit, so collections do not land in random runs.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                return calls * units, elapsed
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def run_benchmarks(benchmarks, repeats=5, seed=0, min_seconds=MIN_SECONDS, verbose=True):
+    # Median rate of repeats measurements: robust to a disturbed run in either direction
+    results = {}
+    for name, unit, function in benchmarks:
+        seed_everything(seed)
+        units, run = function()
+        run()  # Warm-up: caches, lazy imports and allocator pools
+        measurements = [measure(units, run, min_seconds) for _ in range(repeats)]
+        rates = [done / seconds for done, seconds in measurements]
+        rate = float(np.median(rates))
+        results[name] = {
+            "unit": unit,
+            "units": sum(done for done, _ in measurements),
+            "seconds": sum(seconds for _, seconds in measurements),
+            "rate": rate,
+            "rates": rates,
+        }
+        if verbose:
+            print(f"{name:<45} {rate:>14.6g} {unit}/s  (median of {repeats}, {results[name]['seconds']:.2f} s)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares rates against a baseline run. Returns the names whose rate dropped by more
+    than threshold (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<45} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result["rate"] / baseline[name]["rate"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45} {baseline[name]['rate']:>14.6g} {result['rate']:>14.6g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def metadata():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the environments, agents and the comparison experiment.")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[35, 100, 1000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256],
+                        help="Games stepped together by the batch environment and the evaluation engine")
+    parser.add_argument("--dqn-batch-sizes", type=int, nargs="+", default=[32, 64, 256])
+    parser.add_argument("--repeats", type=int, default=5, help="Measurements per benchmark; the median rate is reported")
+    parser.add_argument("--min-time", type=float, default=MIN_SECONDS,
+                        help="Seconds each measurement repeats its benchmark for")
+    parser.add_argument("--only", nargs="+", default=None, help="Glob patterns of benchmark names to run, e.g. 'env.*'")
+    parser.add_argument("--skip", nargs="+", default=[], help="Glob patterns of benchmark names to skip")
+    parser.add_argument("--output", default="results/benchmarks.json")
+    parser.add_argument("--baseline", default=None, help="Earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Fail when a rate drops more than this fraction below the baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-checks", action="store_true",
+                        help="Skip the check that the fast core matches SupplyChainEnvironment")
+    args = parser.parse_args()
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'experiments')))
+
+    benchmarks = [
+        benchmark for benchmark in build_benchmarks(args.horizons, args.batch_sizes, args.dqn_batch_sizes)
+        if (args.only is None or any(fnmatch.fnmatch(benchmark[0], pattern) for pattern in args.only))
+        and not any(fnmatch.fnmatch(benchmark[0], pattern) for pattern in args.skip)
+    ]
+    if not args.skip_checks:
+        # Inexact fractional costs also check that period costs are added in the env's order
+        for horizon in args.horizons:
+            check_fast_core(horizon, 16)
+            check_fast_core(horizon, 16, holding_cost=0.7, backlog_cost=2.3)
+        print(f"[Info] fast core matches SupplyChainEnvironment (numba: {NUMBA_AVAILABLE})")
+
+    results = run_benchmarks(benchmarks, args.repeats, args.seed, args.min_time)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"metadata": metadata(), "settings": vars(args), "benchmarks": results}, f, indent=2)
+    print(f"[Info] Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"[Error] {len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("[Info] No regressions")
+
+
+if __name__ == "__main__":
+    main()
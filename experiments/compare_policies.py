@@ -1,65 +1,86 @@
+import argparse
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.environment.supply_chain_env import SupplyChainEnvironment
-from src.agents.rlom import RLOrderingMechanism
-from src.agents.one_for_one import OneForOnePolicy
-from src.agents.ga_based import GABasedPolicy
-from src.agents.dqn import DQNPolicy
-from src.utils.visualizer import (
-    plot_inventory,
-    plot_orders,
-    plot_period_costs,
-    plot_total_costs
-)
-from src.utils.visualizer import plot_cumulative_costs_over_time
-
-def evaluate_strategy(name, policy_class, env_class):
-    env = env_class()
-    policy = policy_class(env)
-
-    if name == "RLOM":
-        print("[Info] Training RLOM strategy...")
-        policy.train(episodes=500)
-
-    total_cost, log = policy.evaluate()
-    print(f"[{name}] Total Cost: {total_cost}")
-    return name, total_cost, log
+from src.agents import available_policies, load_policy
+from src.utils.profiling import instrumentation
+
+def evaluate_strategy(name, policy_class, env_class, checkpoint=None):
+    # Timed per strategy, so the phase name is built from the strategy name
+    with instrumentation.phase(f"compare.{name}"):
+        env = env_class()
+
+        # Trained strategies are loaded from their checkpoint when it exists, otherwise trained and saved
+        if checkpoint and os.path.exists(checkpoint):
+            print(f"[Info] Loading {name} strategy from {checkpoint}...")
+            policy = policy_class.load(checkpoint, env)
+        else:
+            policy = policy_class(env)
+            if name == "RLOM":
+                print("[Info] Training RLOM strategy...")
+                policy.train(episodes=500)
+            elif name == "DQN":
+                print("[Info] Training DQN strategy...")
+                policy.train(episodes=300)
+            elif name == "DP":
+                print("[Info] Planning DP strategy...")
+                policy.plan()
+            if checkpoint:
+                policy.save(checkpoint)
+
+        total_cost, log = policy.evaluate()
+        print(f"[{name}] Total Cost: {total_cost}")
+        return name, total_cost, log
 
 
 
 
 def main():
-    env_class = SupplyChainEnvironment
+    parser = argparse.ArgumentParser(description="Compare the ordering strategies on the beer game.")
+    parser.add_argument("--rlom-checkpoint", default=None, help="RLOM Q-table .npz to load, or to write after training")
+    parser.add_argument("--dqn-checkpoint", default=None, help="DQN .pt checkpoint to load, or to write after training")
+    parser.add_argument("--policies", nargs="+", default=available_policies(), choices=available_policies(),
+                        help="Strategies to compare; only their modules are imported")
+    parser.add_argument("--no-plot", action="store_true", help="Skip the HTML report (and the plotly import)")
+    parser.add_argument("--metrics", default=None, help="Record per-phase timings and counters and write them to this .json or .csv file")
+    parser.add_argument("--track-allocations", action="store_true", help="Also record bytes allocated per phase (slow)")
+    parser.add_argument("--prometheus-port", type=int, default=None, help="Serve live metrics on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    if args.metrics or args.prometheus_port:
+        instrumentation.enable(track_allocations=args.track_allocations)
+    if args.prometheus_port:
+        instrumentation.serve_prometheus(args.prometheus_port)
 
-    results = []
+    env_class = SupplyChainEnvironment
 
-    # Evaluate RLOM
-    results.append(evaluate_strategy("RLOM", RLOrderingMechanism, env_class))
+    checkpoints = {"RLOM": args.rlom_checkpoint, "DQN": args.dqn_checkpoint}
 
-    # Evaluate GA-Based
-    results.append(evaluate_strategy("GA-Based", GABasedPolicy, env_class))
+    results = []
 
-    # Evaluate One-for-One
-    results.append(evaluate_strategy("1-for-1", OneForOnePolicy, env_class))
+    # Evaluate each selected strategy; its agent module is imported here
+    for name in args.policies:
+        results.append(evaluate_strategy(name, load_policy(name), env_class, checkpoints.get(name)))
 
-    # Evaluate DQN
-    results.append(evaluate_strategy("DQN", DQNPolicy, env_class))
+    if not args.no_plot:
+        # Visualize: every chart goes into one report sharing a single plotly.js bundle
+        from src.utils.visualizer import ReportBuilder
 
-    # Visualize
-    for name, cost, log in results:
-        plot_inventory(log, name)
-        plot_orders(log, name)
-        plot_period_costs(log, name)
+        report = ReportBuilder()
+        for name, cost, log in results:
+            report.add_strategy(log, name)
 
-   # Optional: summary bar chart of total costs
-    plot_total_costs({name: cost for name, cost, _ in results})
+        # Summary bar chart of total costs and cumulative cost over time
+        report.add_comparison(
+            {name: cost for name, cost, _ in results},
+            {name: log for name, _, log in results},
+        )
+        print(f"[Info] Report written to {report.write('results/report.html')}")
 
-    # cumulative cost over time
-    plot_cumulative_costs_over_time({
-        name: log for name, _, log in results
-    })
+    if args.metrics:
+        print(f"[Info] Metrics written to {instrumentation.export(args.metrics)}")
 
 
 
@@ -0,0 +1,62 @@
+import argparse
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.agents import load_policy
+from src.utils.metrics import ECHELONS
+from src.utils.result_cache import EvaluationCache
+from src.utils.sweep import run_sweep
+
+
+def build_policies(rlom_episodes):
+    policies = {
+        "GA-Based": load_policy("GA-Based")(SupplyChainEnvironment()),
+        "1-for-1": load_policy("1-for-1")(SupplyChainEnvironment()),
+    }
+    if rlom_episodes > 0:
+        print("[Info] Training RLOM strategy...")
+        rlom = load_policy("RLOM")(SupplyChainEnvironment())
+        rlom.train(episodes=rlom_episodes, verbose=False)
+        policies["RLOM"] = rlom
+    return policies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the strategies over a grid of generated scenarios.")
+    parser.add_argument("--output-dir", default="results/sweep")
+    parser.add_argument("--replicates", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["npz", "parquet"], default="npz")
+    parser.add_argument("--rlom-episodes", type=int, default=500, help="0 skips RLOM")
+    parser.add_argument("--cache", default=None, help="SQLite file of cached evaluations shared across runs, e.g. results/cache.db")
+    parser.add_argument("--metrics", action="store_true", help="Also record bullwhip, fill rate and backlog KPIs per echelon")
+    args = parser.parse_args()
+
+    results = run_sweep(
+        build_policies(args.rlom_episodes),
+        args.output_dir,
+        replicates=args.replicates,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        seed=args.seed,
+        file_format=args.format,
+        metrics=args.metrics,
+        cache=EvaluationCache(args.cache) if args.cache else None,
+    )
+
+    for name, columns in results.items():
+        costs = columns["total_cost"]
+        print(f"[{name}] {len(costs)} episodes, mean cost {costs.mean():.1f}, std {costs.std():.1f}")
+        if args.metrics:
+            for kpi in ("bullwhip", "fill_rate"):
+                means = ", ".join(f"{np.nanmean(columns[f'{kpi}_{echelon}']):.2f}" for echelon in ECHELONS)
+                print(f"[{name}] mean {kpi} (retailer .. supplier): {means}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.agents import available_policies, load_policy
+from src.utils.simulation_service import SimulationService
+
+
+def build_policies(names, rlom_checkpoint, dqn_checkpoint):
+    # Trained strategies come from their checkpoints; RLOM is trained and DP planned at startup otherwise
+    checkpoints = {"RLOM": rlom_checkpoint, "DQN": dqn_checkpoint}
+    policies = {}
+    for name in names:
+        policy_class = load_policy(name)
+        checkpoint = checkpoints.get(name)
+        if checkpoint:
+            print(f"[Info] Loading {name} strategy from {checkpoint}...")
+            policies[name] = policy_class.load(checkpoint, SupplyChainEnvironment())
+        elif name == "DQN":
+            print("[Info] Skipping DQN: it needs --dqn-checkpoint")
+        else:
+            policies[name] = policy_class(SupplyChainEnvironment())
+            if name == "RLOM":
+                print("[Info] Training RLOM strategy...")
+                policies[name].train(episodes=500, verbose=False)
+            elif name == "DP":
+                print("[Info] Planning DP strategy...")
+                policies[name].plan(verbose=False)
+    return policies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve what-if cost queries for the strategies over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None, help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--policies", nargs="+", default=available_policies(), choices=available_policies())
+    parser.add_argument("--rlom-checkpoint", default=None)
+    parser.add_argument("--dqn-checkpoint", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes; 0 simulates in-process")
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    service = SimulationService(
+        build_policies(args.policies, args.rlom_checkpoint, args.dqn_checkpoint),
+        workers=args.workers,
+        cache_size=args.cache_size,
+        batch_window=args.batch_window_ms / 1000,
+    )
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"[Info] Serving {', '.join(service.policies)} on {where}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import importlib
+
+# Policy registry: name -> "module:class". Agent modules are imported only when their
+# policy is loaded, so e.g. 1-for-1 runs never import torch.
+POLICY_REGISTRY = {
+    "RLOM": "src.agents.rlom:RLOrderingMechanism",
+    "GA-Based": "src.agents.ga_based:GABasedPolicy",
+    "1-for-1": "src.agents.one_for_one:OneForOnePolicy",
+    "DQN": "src.agents.dqn:DQNPolicy",
+    "DP": "src.agents.dp_planner:DynamicProgrammingPlanner",
+}
+
+
+def register_policy(name, target):
+    # target is a "module:class" path, imported on first use
+    POLICY_REGISTRY[name] = target
+
+
+def available_policies():
+    return list(POLICY_REGISTRY)
+
+
+def load_policy(name):
+    """
+    Returns the Policy class registered under name, importing its module on first use.
+    """
+    if name not in POLICY_REGISTRY:
+        raise KeyError(f"unknown policy {name!r}, available: {', '.join(POLICY_REGISTRY)}")
+    module_name, class_name = POLICY_REGISTRY[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
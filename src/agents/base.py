@@ -0,0 +1,49 @@
+import hashlib
+
+from src.utils.evaluation import evaluate_policy
+
+
+# Common protocol of the ordering policies: act() picks the per-echelon adjustments for one period
+class Policy:
+    # True when act_batch() can choose actions for a BatchSupplyChainEnvironment
+    supports_batch = False
+
+    def __init__(self, env):
+        self.env = env
+
+    def reset(self):
+        # Called by the evaluation engine at the start of every episode
+        pass
+
+    def act(self, state, env_view):
+        """
+        Returns the actions [retailer, distributor, manufacturer, supplier] for the current period.
+        env_view is the environment being played and must only be read.
+        """
+        raise NotImplementedError
+
+    def act_batch(self, states, env_view):
+        # Same as act() for an (N, 4) array of states, returning an (N, 4) array of actions
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """
+        Hex digest that changes whenever the policy's decisions can change, used to key cached
+        results. Policies with parameters or learned state mix them in with _digest().
+        """
+        return self._digest()
+
+    def _digest(self, *parts):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{type(self).__module__}.{type(self).__qualname__}".encode())
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        return digest.hexdigest()
+
+    def evaluate(self):
+        """
+        Plays one recorded episode on self.env.
+        Returns the total cost and a log dictionary for the visualizer.
+        """
+        total_cost, result = evaluate_policy(self)
+        return total_cost, result.to_log()
@@ -0,0 +1,171 @@
+# Model-based planner: value iteration over the coded state space with an empirical model
+import numpy as np
+
+from src.agents.base import Policy
+from src.agents.q_table import DenseQTable, GreedyPolicyTable
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.utils.evaluation import evaluate_policy
+from src.utils.profiling import instrumentation
+
+
+class DynamicProgrammingPlanner(Policy):
+    """
+    Plans a greedy policy over the coded states of self.env instead of learning it by sampling.
+    The coded state hides the pipeline and the exact inventories, so the transitions between
+    coded states are estimated from batched rollouts: visit counts of (state, action, next state)
+    and the mean period cost of every (state, action). Value iteration then runs over the whole
+    n_codes ** 4 x action_range ** 4 table with NumPy, for time_horizon backups by default
+    (backward induction over the episode).
+    The result is a DenseQTable of negated expected costs, so it has the same reward sign and
+    get_optimal_policy() layout as RLOrderingMechanism.
+    """
+
+    supports_batch = True
+
+    def __init__(self, env, action_range=4, discount_factor=1.0, seed=None):
+        self.env = env
+        self.action_range = action_range
+        self.discount_factor = discount_factor
+        self.rng = np.random.default_rng(seed)
+
+        self.n_states = env.n_state_codes ** 4
+        self.n_actions = action_range ** 4
+        self.action_shape = (action_range,) * 4
+
+        # Empirical model: per (state, action) pair visit counts and summed period costs,
+        # and the sorted unique (pair, next state) keys with their counts
+        self.pair_counts = np.zeros(self.n_states * self.n_actions, dtype=np.int64)
+        self.pair_costs = np.zeros(self.n_states * self.n_actions, dtype=np.float64)
+        self.transition_keys = np.zeros(0, dtype=np.int64)
+        self.transition_counts = np.zeros(0, dtype=np.int64)
+
+        self.q_table = DenseQTable(n_codes=env.n_state_codes, action_range=action_range)
+        self._greedy = None
+        self.round_costs = []
+
+    @instrumentation.timed("dp.collect")
+    def collect(self, num_episodes=20000, exploration=1.0, chunk_size=20000):
+        """
+        Plays num_episodes batched episodes of self.env's scenario and adds their transitions to
+        the model. Each action is uniformly random with probability exploration and greedy
+        under the current plan otherwise. Returns the number of transitions added.
+        """
+        env = self.env
+        greedy = self.compile_policy() if exploration < 1 else None
+        added = 0
+        for start in range(0, num_episodes, chunk_size):
+            n = min(chunk_size, num_episodes - start)
+            batch = BatchSupplyChainEnvironment.from_env(env, n)
+            batch.reset()
+            keys, costs = [], []
+            states = batch.get_coded_states()
+            for _ in range(env.time_horizon):
+                actions = self.rng.integers(0, self.n_actions, n)
+                if greedy is not None:
+                    exploit = self.rng.random(n) >= exploration
+                    actions[exploit] = np.ravel_multi_index(greedy.lookup_batch(states[exploit]).T, self.action_shape)
+                _, _, _, info = batch.step(np.stack(np.unravel_index(actions, self.action_shape), axis=1))
+                next_states = batch.get_coded_states()
+                keys.append((states * self.n_actions + actions) * self.n_states + next_states)
+                costs.append(info["period_cost"])
+                states = next_states
+            instrumentation.count("env.steps", n * env.time_horizon)
+
+            keys = np.concatenate(keys)
+            pairs = keys // self.n_states
+            self.pair_counts += np.bincount(pairs, minlength=len(self.pair_counts))
+            self.pair_costs += np.bincount(pairs, weights=np.concatenate(costs), minlength=len(self.pair_costs))
+            self._add_transitions(*np.unique(keys, return_counts=True))
+            added += len(keys)
+        return added
+
+    def _add_transitions(self, keys, counts):
+        merged, inverse = np.unique(np.concatenate([self.transition_keys, keys]), return_inverse=True)
+        self.transition_counts = np.bincount(
+            inverse, weights=np.concatenate([self.transition_counts, counts]), minlength=len(merged)
+        ).astype(np.int64)
+        self.transition_keys = merged
+
+    @instrumentation.timed("dp.solve")
+    def solve(self, iterations=None, tolerance=1e-6):
+        """
+        Runs value iteration on the collected model and replaces self.q_table with the result.
+        iterations defaults to the episode length; it stops earlier once no state value changes
+        by more than tolerance. Actions never tried in a state are never chosen, and states
+        that were only reached at the end of an episode get the worst known value.
+        Returns the (n_states,) expected cost-to-go.
+        """
+        if not len(self.transition_keys):
+            raise ValueError("the model is empty, collect() transitions first")
+        if iterations is None:
+            iterations = self.env.time_horizon
+
+        pairs = self.transition_keys // self.n_states
+        next_states = self.transition_keys % self.n_states
+        tried = self.pair_counts > 0
+        probabilities = self.transition_counts / self.pair_counts[pairs]
+        mean_costs = np.divide(self.pair_costs, self.pair_counts, out=np.zeros(len(self.pair_costs)), where=tried)
+
+        values = np.zeros(self.n_states)
+        for _ in range(max(iterations, 1)):
+            expected = np.bincount(pairs, weights=probabilities * values[next_states], minlength=len(tried))
+            q_values = np.where(tried, mean_costs + self.discount_factor * expected, np.inf).reshape(self.n_states, -1)
+            new_values = q_values.min(axis=1)
+            known = np.isfinite(new_values)
+            new_values[~known] = new_values[known].max()
+            converged = np.abs(new_values - values).max() <= tolerance
+            values = new_values
+            if converged:
+                break
+
+        # Rewards are negated costs, like the Q-values RLOrderingMechanism learns
+        table = DenseQTable(n_codes=self.env.n_state_codes, action_range=self.action_range,
+                            values=np.where(known[:, None], -q_values, 0).astype(np.float32))
+        table.visited = known
+        self.q_table = table
+        return values
+
+    @instrumentation.timed("dp.plan")
+    def plan(self, rounds=5, episodes_per_round=20000, exploration=0.2, verbose=True):
+        """
+        Alternates collect() and solve(): the first round explores uniformly, later rounds
+        sample around the current plan so the model is refined where the plan goes.
+        The plan is not guaranteed to improve from round to round, so the one with the lowest
+        cost on self.env is kept. Returns that cost per round.
+        """
+        best_cost, best_table = None, None
+        for round_index in range(rounds):
+            self.collect(episodes_per_round, exploration=1.0 if round_index == 0 else exploration)
+            self.solve()
+            total_cost, _ = evaluate_policy(self, record=False)
+            self.round_costs.append(total_cost)
+            if best_cost is None or total_cost < best_cost:
+                best_cost, best_table = total_cost, self.q_table
+            if verbose:
+                print(f"Round: {round_index + 1}/{rounds}, Transitions: {len(self.transition_keys)}, Total Cost: {total_cost}")
+        self.q_table = best_table
+        return self.round_costs
+
+    def compile_policy(self):
+        # GreedyPolicyTable of the planned Q-table, rebuilt after every solve()
+        if self._greedy is None or self._greedy.q_table is not self.q_table:
+            self._greedy = GreedyPolicyTable(self.q_table, self.env.n_state_codes, 4, self.action_range)
+        return self._greedy
+
+    def get_optimal_policy(self):
+        # {coded_state: [a0, a1, a2, a3]} over the states the model knows
+        return self.q_table.greedy_policy()
+
+    def reset(self):
+        self.compile_policy()
+
+    def fingerprint(self):
+        return self._digest(self.env.bucket_edges, self.compile_policy().table().tobytes())
+
+    def act(self, state, env_view):
+        # States outside the model fall back to no adjustment
+        coded_state = env_view.code_state(state)
+        return self.compile_policy().lookup(env_view.state_index(coded_state))
+
+    def act_batch(self, states, env_view):
+        return self.compile_policy().lookup_batch(env_view.get_coded_states())
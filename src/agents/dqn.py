@@ -1,10 +1,16 @@
+import time
+
 import numpy as np
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
-from collections import deque
 import random
 
+from src.agents.base import Policy
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.utils.profiling import instrumentation
+
 class QNetwork(nn.Module):
     def __init__(self, state_dim, action_dim):
         super(QNetwork, self).__init__()
@@ -20,52 +26,323 @@ class QNetwork(nn.Module):
         return self.model(x)
 
 
-class DQNPolicy:
-    def __init__(self, env, state_dim=4, action_dim=256, gamma=0.99, lr=0.001, epsilon=1.0):
+# Preallocated circular replay buffer, sampled as whole tensors per minibatch
+class ReplayBuffer:
+    def __init__(self, capacity, state_dim):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        # Writes K transitions at once, wrapping around the end of the buffer
+        indices = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.position = int(indices[-1] + 1) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size):
+        indices = np.random.randint(0, self.size, size=batch_size)
+        return (
+            torch.from_numpy(self.states[indices]),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_states[indices]),
+            torch.from_numpy(self.dones[indices]),
+        )
+
+
+# Steps K beer games together and picks all K actions with one batched forward pass
+class VectorRolloutCollector:
+    def __init__(self, policy, num_envs=16):
+        self.policy = policy
+        self.envs = BatchSupplyChainEnvironment.from_env(policy.env, num_envs)
+        self.num_envs = num_envs
+        self.states = self.policy.preprocess(self.envs.reset())
+        self.episode_rewards = np.zeros(num_envs)
+        self.completed_episode_rewards = []
+
+    def choose_actions(self, states):
+        # Greedy actions from one forward pass, replaced by random ones with probability epsilon
+        with torch.no_grad():
+            q_values = self.policy.model(torch.from_numpy(states))
+        actions = q_values.argmax(dim=1).numpy()
+        explore = np.random.rand(self.num_envs) < self.policy.epsilon
+        actions[explore] = np.random.randint(0, self.policy.action_dim, size=int(explore.sum()))
+        return actions
+
+    def collect(self, num_steps=1):
+        """
+        Advances all environments num_steps periods and writes the K transitions of each
+        period straight into the policy's replay buffer. Returns the number of env steps taken.
+        """
+        policy = self.policy
+        for _ in range(num_steps):
+            action_indices = self.choose_actions(self.states)
+            actions = np.stack(np.unravel_index(action_indices, policy.action_shape), axis=1)
+            next_states, rewards, done, _ = self.envs.step(actions)
+            next_states = policy.preprocess(next_states)
+
+            policy.memory.add_batch(self.states, action_indices, rewards * policy.reward_scale,
+                                    next_states, np.full(self.num_envs, done, dtype=np.float32))
+            self.episode_rewards += rewards
+
+            if done:
+                self.completed_episode_rewards.extend(self.episode_rewards.tolist())
+                self.episode_rewards[:] = 0
+                next_states = policy.preprocess(self.envs.reset())
+            self.states = next_states
+        return num_steps * self.num_envs
+
+
+class DQNPolicy(Policy):
+    supports_batch = True
+
+    def __init__(self, env, state_dim=4, action_dim=256, gamma=0.99, lr=0.001, epsilon=1.0,
+                 action_range=4, buffer_size=10000, batch_size=64, state_scale=10.0, reward_scale=0.01,
+                 num_threads=None):
+        # Caps the intra-op CPU threads torch uses for forward and backward passes
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
         self.env = env
+        # Constructor arguments, stored in checkpoints
+        self.hyperparameters = {
+            "state_dim": state_dim, "action_dim": action_dim, "gamma": gamma, "lr": lr, "epsilon": epsilon,
+            "action_range": action_range, "buffer_size": buffer_size, "batch_size": batch_size,
+            "state_scale": state_scale, "reward_scale": reward_scale,
+        }
         self.model = QNetwork(state_dim, action_dim)
         self.target_model = QNetwork(state_dim, action_dim)
         self.target_model.load_state_dict(self.model.state_dict())
         self.optimizer = optim.Adam(self.model.parameters(), lr=lr)
-        self.memory = deque(maxlen=10000)
+        self.memory = ReplayBuffer(buffer_size, state_dim)
         self.gamma = gamma
         self.epsilon = epsilon
-        self.batch_size = 64
+        self.batch_size = batch_size
+
+        # Each discrete action is one adjustment in [0, action_range) per echelon
+        self.action_dim = action_dim
+        self.action_shape = (action_range,) * state_dim
+        if action_range ** state_dim != action_dim:
+            raise ValueError(f"action_dim={action_dim} does not match action_range={action_range} per echelon")
+
+        # Inventories and costs are scaled before they reach the network
+        self.state_scale = state_scale
+        self.reward_scale = reward_scale
+
+        self.episode_rewards = []
+        self.training_stats = {}
+
+    def decode_action(self, action_index):
+        # Flattened index -> per-echelon adjustments, same layout as the RLOM Q-table
+        return [int(a) for a in np.unravel_index(action_index, self.action_shape)]
+
+    def preprocess(self, state):
+        return np.asarray(state, dtype=np.float32) / self.state_scale
 
     def choose_action(self, state):
         if np.random.rand() < self.epsilon:
-            return random.randint(0, 255)
+            return random.randint(0, self.action_dim - 1)
         with torch.no_grad():
-            state_tensor = torch.FloatTensor(state)
+            state_tensor = torch.from_numpy(self.preprocess(state))
             q_values = self.model(state_tensor)
             return torch.argmax(q_values).item()
 
-    def evaluate(self):
-        # simplified evaluation using fixed policy
-        state = self.env.reset()
-        done = False
-        total_reward = 0
-        inventory_history = [[] for _ in range(4)]
-        order_history = [[] for _ in range(4)]
-        period_costs = []
-
-        while not done:
-            state_code = self.env.code_state(state)
-            action = [0, 0, 0, 0]  # Replace with proper decoding logic
-            next_state, reward, done, info = self.env.step(action)
-
-            for i in range(4):
-                inventory_history[i].append(self.env.inventory_position[i])
-                order_history[i].append(self.env.orders_received[i])
-
-            period_costs.append(info["period_cost"])
-            state = next_state
-            total_reward += reward
-
-        log = {
-            "inventory_history": inventory_history,
-            "order_history": order_history,
-            "period_costs": period_costs
+    def learn(self):
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+
+        q_values = self.model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        with torch.no_grad():
+            next_q_values = self.target_model(next_states).max(dim=1).values
+            targets = rewards + self.gamma * (1.0 - dones) * next_q_values
+
+        loss = F.smooth_l1_loss(q_values, targets)
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+
+    @instrumentation.timed("dqn.train")
+    def train(self, episodes=500, epsilon_start=1.0, epsilon_end=0.05, epsilon_decay_episodes=None,
+              target_update_interval=500, learning_starts=None, train_frequency=1, verbose=True):
+        """
+        Trains the Q-network with experience replay and a periodically synced target network.
+        Epsilon decays linearly from epsilon_start to epsilon_end over epsilon_decay_episodes.
+        """
+        if epsilon_decay_episodes is None:
+            epsilon_decay_episodes = max(1, int(episodes * 0.8))
+        if learning_starts is None:
+            learning_starts = self.batch_size
+
+        env_steps = 0
+        updates = 0
+        start = time.perf_counter()
+
+        for episode in range(episodes):
+            fraction = min(1.0, episode / epsilon_decay_episodes)
+            self.epsilon = epsilon_start + fraction * (epsilon_end - epsilon_start)
+
+            state = self.env.reset()
+            total_reward = 0
+            done = False
+
+            while not done:
+                with instrumentation.phase("dqn.choose_action"):
+                    action_index = self.choose_action(state)
+                with instrumentation.phase("env.step"):
+                    next_state, reward, done, _ = self.env.step(self.decode_action(action_index))
+
+                self.memory.add(self.preprocess(state), action_index, reward * self.reward_scale,
+                                self.preprocess(next_state), done)
+                env_steps += 1
+
+                if len(self.memory) >= learning_starts and env_steps % train_frequency == 0:
+                    with instrumentation.phase("dqn.learn"):
+                        self.learn()
+                    updates += 1
+                    if updates % target_update_interval == 0:
+                        self.target_model.load_state_dict(self.model.state_dict())
+
+                state = next_state
+                total_reward += reward
+
+            self.episode_rewards.append(total_reward)
+
+            if verbose and (episode + 1) % 50 == 0:
+                print(f"Episode: {episode + 1}/{episodes}, Total Reward: {total_reward}, Total Cost: {-total_reward}, Epsilon: {self.epsilon:.2f}")
+
+        elapsed = time.perf_counter() - start
+        instrumentation.count("env.steps", env_steps)
+        instrumentation.count("dqn.updates", updates)
+        instrumentation.count("dqn.episodes", episodes)
+        self.training_stats = {
+            "env_steps": env_steps,
+            "updates": updates,
+            "seconds": elapsed,
+            "env_steps_per_sec": env_steps / elapsed,
+            "updates_per_sec": updates / elapsed,
+        }
+        if verbose:
+            print(f"[DQN] {self.training_stats['env_steps_per_sec']:.0f} env steps/s, "
+                  f"{self.training_stats['updates_per_sec']:.0f} updates/s")
+
+        return self.episode_rewards
+
+    @instrumentation.timed("dqn.train_vectorized")
+    def train_vectorized(self, episodes=500, num_envs=16, epsilon_start=1.0, epsilon_end=0.05,
+                         epsilon_decay_episodes=None, target_update_interval=500, learning_starts=None,
+                         updates_per_step=1, num_threads=None, verbose=True):
+        """
+        Same as train(), but rolls out num_envs games at once with a VectorRolloutCollector.
+        episodes counts individual games, so each batch of games counts num_envs times.
+        """
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        if epsilon_decay_episodes is None:
+            epsilon_decay_episodes = max(1, int(episodes * 0.8))
+        if learning_starts is None:
+            learning_starts = self.batch_size
+
+        collector = VectorRolloutCollector(self, num_envs)
+        env_steps = 0
+        updates = 0
+        start = time.perf_counter()
+
+        for episode in range(0, episodes, num_envs):
+            fraction = min(1.0, episode / epsilon_decay_episodes)
+            self.epsilon = epsilon_start + fraction * (epsilon_end - epsilon_start)
+
+            for _ in range(collector.envs.time_horizon):
+                with instrumentation.phase("dqn.collect"):
+                    env_steps += collector.collect()
+
+                if len(self.memory) >= learning_starts:
+                    for _ in range(updates_per_step):
+                        with instrumentation.phase("dqn.learn"):
+                            self.learn()
+                        updates += 1
+                        if updates % target_update_interval == 0:
+                            self.target_model.load_state_dict(self.model.state_dict())
+
+            batch_rewards = collector.completed_episode_rewards[-num_envs:]
+            self.episode_rewards.extend(batch_rewards)
+
+            if verbose and (episode // num_envs + 1) % 10 == 0:
+                print(f"Episode: {episode + num_envs}/{episodes}, Mean Total Cost: {-np.mean(batch_rewards):.1f}, Epsilon: {self.epsilon:.2f}")
+
+        elapsed = time.perf_counter() - start
+        instrumentation.count("env.steps", env_steps)
+        instrumentation.count("dqn.updates", updates)
+        instrumentation.count("dqn.episodes", episodes)
+        self.training_stats = {
+            "env_steps": env_steps,
+            "updates": updates,
+            "seconds": elapsed,
+            "env_steps_per_sec": env_steps / elapsed,
+            "updates_per_sec": updates / elapsed,
         }
+        if verbose:
+            print(f"[DQN] {self.training_stats['env_steps_per_sec']:.0f} env steps/s, "
+                  f"{self.training_stats['updates_per_sec']:.0f} updates/s")
+
+        return self.episode_rewards
 
-        return -total_reward, log
+    def greedy_action(self, state):
+        with torch.no_grad():
+            q_values = self.model(torch.from_numpy(self.preprocess(state)))
+        return self.decode_action(torch.argmax(q_values).item())
+
+    def save(self, path):
+        # Network weights, target network and optimizer state in one torch checkpoint
+        torch.save({
+            "hyperparameters": self.hyperparameters,
+            "model": self.model.state_dict(),
+            "target_model": self.target_model.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "epsilon": self.epsilon,
+        }, path)
+
+    @classmethod
+    def load(cls, path, env, num_threads=None):
+        # Rebuilds a trained policy from a save() checkpoint; training can resume from it
+        checkpoint = torch.load(path)
+        policy = cls(env, num_threads=num_threads, **checkpoint["hyperparameters"])
+        policy.model.load_state_dict(checkpoint["model"])
+        policy.target_model.load_state_dict(checkpoint["target_model"])
+        policy.optimizer.load_state_dict(checkpoint["optimizer"])
+        policy.epsilon = checkpoint["epsilon"]
+        return policy
+
+    def fingerprint(self):
+        weights = [tensor.detach().cpu().numpy().tobytes() for tensor in self.model.state_dict().values()]
+        return self._digest(self.action_shape, self.state_scale, *weights)
+
+    def act(self, state, env_view):
+        return self.greedy_action(state)
+
+    def act_batch(self, states, env_view):
+        with torch.no_grad():
+            q_values = self.model(torch.from_numpy(self.preprocess(states)))
+        return np.stack(np.unravel_index(q_values.argmax(dim=1).numpy(), self.action_shape), axis=1)
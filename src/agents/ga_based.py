@@ -1,44 +1,40 @@
-# simplified GA-based policy from the paper
-class GABasedPolicy:
-    def __init__(self, env):
-        self.env = env
-        
-        # Fixed Y values for each actor based on approximate GA solution from the paper
-        self.fixed_y_values = [1, 2, 1, 0] 
-    
-    def evaluate(self):
-        """
-        Evaluates the GA-based fixed strategy in the environment.
-        Returns total cost and time-series log data for plotting.
-        """
-        state = self.env.reset()
-        total_reward = 0
-        done = False
+import numpy as np
+
+from src.agents.base import Policy
+from src.agents.ga_optimizer import GeneticAlgorithmOptimizer
 
-        # Initialize logging structures
-        inventory_history = [[], [], [], []]
-        order_history = [[], [], [], []]
-        period_costs = []
 
-        while not done:
-            action = self.fixed_y_values  # Use fixed Y values for all steps
-            next_state, reward, done, info = self.env.step(action)
+# simplified GA-based policy from the paper
+class GABasedPolicy(Policy):
+    supports_batch = True
+
+    def __init__(self, env, y_values=None):
+        self.env = env
 
-            # Log inventory and order data for each level
-            for i in range(4):
-                inventory_history[i].append(self.env.inventory_position[i])
-                order_history[i].append(self.env.orders_received[i])
+        # Fixed Y values for each actor based on approximate GA solution from the paper.
+        # A list of per-period rows ([[y0, y1, y2, y3], ...]) is also accepted.
+        self.fixed_y_values = [1, 2, 1, 0] if y_values is None else y_values
 
-            period_costs.append(info["period_cost"])
-            total_reward += reward
-            state = next_state
+    def optimize(self, initial_population=None, verbose=True, **ga_kwargs):
+        """
+        Searches the Y values with GeneticAlgorithmOptimizer on this policy's environment
+        and uses the best genome found. initial_population and verbose go to run(), the
+        other keyword arguments to the optimizer. Returns the best genome's total cost.
+        """
+        optimizer = GeneticAlgorithmOptimizer(self.env, **ga_kwargs)
+        self.fixed_y_values, best_cost = optimizer.run(initial_population=initial_population, verbose=verbose)
+        return best_cost
 
-        log = {
-            "inventory_history": inventory_history,
-            "order_history": order_history,
-            "period_costs": period_costs
-        }
+    def fingerprint(self):
+        return self._digest(self.fixed_y_values)
 
-        return -total_reward, log  # Return positive cost and log dictionary
+    def _action(self, t):
+        if isinstance(self.fixed_y_values[0], (list, tuple)):
+            return self.fixed_y_values[t]
+        return self.fixed_y_values
 
+    def act(self, state, env_view):
+        return self._action(env_view.current_time)  # Use fixed Y values for all steps
 
+    def act_batch(self, states, env_view):
+        return np.broadcast_to(self._action(env_view.current_time), states.shape)
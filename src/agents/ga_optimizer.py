@@ -0,0 +1,151 @@
+import hashlib
+import time
+
+import numpy as np
+
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.supply_chain_env import cost_dtype
+from src.utils.profiling import instrumentation
+
+
+# Genetic Algorithm search for the Y values (order adjustments) of GABasedPolicy
+class GeneticAlgorithmOptimizer:
+    def __init__(self, env, population_size=1000, generations=100, per_period=False, gene_low=0, gene_high=3,
+                 crossover_rate=0.9, mutation_rate=0.05, elite_fraction=0.02, tournament_size=3,
+                 time_budget=None, chunk_size=8192, cache_size=1_000_000, seed=None):
+        """
+        A genome holds one Y value per echelon, or one per echelon and period when per_period=True.
+        Genes are integers in [gene_low, gene_high]. Fitness is the total cost of the genome played
+        on the scenario of env, evaluated for the whole population at once in a batched simulator.
+        time_budget (seconds) stops the search early. The fitness cache is cleared once it
+        holds cache_size genomes.
+        """
+        self.env = env
+        self.population_size = population_size
+        self.generations = generations
+        self.per_period = per_period
+        self.gene_low = gene_low
+        self.gene_high = gene_high
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.n_elite = max(1, int(round(elite_fraction * population_size)))
+        self.tournament_size = tournament_size
+        self.time_budget = time_budget
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.rng = np.random.default_rng(seed)
+
+        self.genome_shape = (env.time_horizon, 4) if per_period else (4,)
+        self.scenario_key = self._scenario_key()
+
+        # Fitness cache keyed by a digest of (scenario, genome)
+        self.fitness_cache = {}
+        self.cache_hits = 0
+        self.history = []
+
+    def _scenario_key(self):
+        env = self.env
+        horizon = env.time_horizon
+        digest = hashlib.sha1()
+        digest.update(np.asarray(env.customer_demand[:horizon], dtype=np.int64).tobytes())
+        digest.update(np.asarray(env.lead_times[:horizon], dtype=np.int64).tobytes())
+        digest.update(repr((horizon, env.holding_cost, env.backlog_cost)).encode())
+        return digest.digest()
+
+    def _cache_key(self, genome):
+        return hashlib.blake2b(self.scenario_key + genome.tobytes(), digest_size=16).digest()
+
+    def simulate(self, genomes):
+        # Total cost of each genome, played on the scenario in a single batch of games
+        batch = BatchSupplyChainEnvironment.from_env(self.env, len(genomes))
+        for t in range(self.env.time_horizon):
+            batch.step(genomes[:, t] if self.per_period else genomes)
+        return batch.total_cost
+
+    def fitness(self, population):
+        """
+        Total cost per genome. Genomes repeated within the population or seen in earlier
+        generations are looked up in the fitness cache instead of being simulated again.
+        """
+        flat = population.reshape(len(population), -1)
+        unique, inverse = np.unique(flat, axis=0, return_inverse=True)
+        keys = [self._cache_key(genome) for genome in unique]
+
+        costs = np.empty(len(unique), dtype=cost_dtype(self.env.holding_cost, self.env.backlog_cost))
+        missing = []
+        for i, key in enumerate(keys):
+            cost = self.fitness_cache.get(key)
+            if cost is None:
+                missing.append(i)
+            else:
+                costs[i] = cost
+                self.cache_hits += 1
+
+        if len(self.fitness_cache) + len(missing) > self.cache_size:
+            self.fitness_cache.clear()
+
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = np.asarray(missing[start:start + self.chunk_size])
+            genomes = unique[chunk].reshape((len(chunk),) + self.genome_shape)
+            with instrumentation.phase("ga.simulate"):
+                costs[chunk] = self.simulate(genomes)
+            instrumentation.count("ga.simulated_genomes", len(chunk))
+            for i in chunk:
+                self.fitness_cache[keys[i]] = costs[i].item()
+
+        return costs[inverse.reshape(-1)]
+
+    def _random_population(self, size):
+        return self.rng.integers(self.gene_low, self.gene_high + 1, size=(size,) + self.genome_shape)
+
+    def _select(self, population, costs, size):
+        # Tournament selection: the cheapest of tournament_size random genomes wins
+        entrants = self.rng.integers(0, len(population), size=(size, self.tournament_size))
+        winners = entrants[np.arange(size), np.argmin(costs[entrants], axis=1)]
+        return population[winners]
+
+    def _crossover(self, parents_a, parents_b):
+        # Uniform crossover, applied to a crossover_rate share of the pairs
+        mask = self.rng.random(parents_a.shape) < 0.5
+        mask &= (self.rng.random(len(parents_a)) < self.crossover_rate).reshape((-1,) + (1,) * (parents_a.ndim - 1))
+        return np.where(mask, parents_b, parents_a)
+
+    def _mutate(self, population):
+        # Random-reset mutation per gene
+        mask = self.rng.random(population.shape) < self.mutation_rate
+        random_genes = self.rng.integers(self.gene_low, self.gene_high + 1, size=population.shape)
+        return np.where(mask, random_genes, population)
+
+    def run(self, initial_population=None, verbose=True):
+        """
+        Runs the GA and returns (best_genome, best_cost). The best cost per generation is kept in history.
+        """
+        start = time.perf_counter()
+        if initial_population is None:
+            population = self._random_population(self.population_size)
+        else:
+            population = np.asarray(initial_population).reshape((-1,) + self.genome_shape)
+
+        costs = self.fitness(population)
+        n_children = self.population_size - self.n_elite
+
+        for generation in range(self.generations):
+            order = np.argsort(costs, kind="stable")
+            elite = population[order[:self.n_elite]]
+            self.history.append(costs[order[0]].item())
+
+            if verbose and (generation + 1) % 10 == 0:
+                print(f"Generation: {generation + 1}/{self.generations}, Best Cost: {costs[order[0]]}, Cache Size: {len(self.fitness_cache)}")
+
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                break
+
+            parents_a = self._select(population, costs, n_children)
+            parents_b = self._select(population, costs, n_children)
+            children = self._mutate(self._crossover(parents_a, parents_b))
+
+            population = np.concatenate([elite, children])
+            costs = self.fitness(population)
+
+        best = int(np.argmin(costs))
+        return population[best].tolist(), costs[best].item()
@@ -0,0 +1,161 @@
+import numpy as np
+
+from src.environment.supply_chain_env import state_index
+
+
+# Contiguous Q-table over the coded state space, a drop-in for the defaultdict of per-state arrays
+class DenseQTable:
+    def __init__(self, n_codes=9, n_echelons=4, action_range=4, dtype=np.float32, values=None):
+        """
+        Rows are states packed as a mixed-radix integer of the (1-based) codes from code_state,
+        columns are actions flattened over (action_range,) * n_echelons.
+        """
+        self.n_codes = n_codes
+        self.n_echelons = n_echelons
+        self.action_range = action_range
+        self.action_shape = (action_range,) * n_echelons
+        self.n_states = n_codes ** n_echelons
+        self.n_actions = action_range ** n_echelons
+
+        if values is None:
+            values = np.zeros((self.n_states, self.n_actions), dtype=dtype)
+        if values.shape != (self.n_states, self.n_actions):
+            raise ValueError(f"expected a {(self.n_states, self.n_actions)} table, got {values.shape}")
+        self.values = values
+        self.visited = np.zeros(self.n_states, dtype=bool)
+
+    def state_index(self, coded_state):
+        return state_index(coded_state, self.n_codes)
+
+    def decode_state(self, index):
+        return tuple(int(code) + 1 for code in np.unravel_index(index, (self.n_codes,) * self.n_echelons))
+
+    def action_index(self, action):
+        return int(np.ravel_multi_index(tuple(action), self.action_shape))
+
+    def decode_action(self, index):
+        return [int(a) for a in np.unravel_index(index, self.action_shape)]
+
+    # Mapping interface, so code written against the defaultdict keeps working
+    def __getitem__(self, coded_state):
+        index = self.state_index(coded_state)
+        self.visited[index] = True
+        return self.values[index].reshape(self.action_shape)
+
+    def __setitem__(self, coded_state, q_values):
+        index = self.state_index(coded_state)
+        self.visited[index] = True
+        self.values[index] = np.reshape(q_values, self.n_actions)
+
+    def __contains__(self, coded_state):
+        return bool(self.visited[self.state_index(coded_state)])
+
+    def __iter__(self):
+        for index in np.flatnonzero(self.visited):
+            yield self.decode_state(index)
+
+    def __len__(self):
+        return int(self.visited.sum())
+
+    def keys(self):
+        return list(iter(self))
+
+    def items(self):
+        for coded_state in self:
+            yield coded_state, self.values[self.state_index(coded_state)].reshape(self.action_shape)
+
+    def update(self, other):
+        for coded_state, q_values in other.items():
+            self[coded_state] = q_values
+
+    # Fast paths on packed indices
+    def greedy_action_index(self, state_index):
+        return int(self.values[state_index].argmax())
+
+    def max_value(self, state_index):
+        self.visited[state_index] = True
+        return self.values[state_index].max()
+
+    def greedy_policy(self):
+        # Row argmax over every visited state at once
+        indices = np.flatnonzero(self.visited)
+        actions = np.stack(np.unravel_index(self.values[indices].argmax(axis=1), self.action_shape), axis=1)
+        return {self.decode_state(index): [int(a) for a in action] for index, action in zip(indices, actions)}
+
+    def save(self, path):
+        np.save(path, self.values)
+
+    @classmethod
+    def load(cls, path, n_codes=9, n_echelons=4, action_range=4, mmap_mode=None):
+        values = np.load(path, mmap_mode=mmap_mode)
+        table = cls(n_codes, n_echelons, action_range, dtype=values.dtype, values=values)
+        # Rows that were never updated are all zero, same as unvisited states
+        table.visited = np.asarray(values).any(axis=1)
+        return table
+
+
+# Greedy policy compiled from a Q-table into a dense action array, refreshed row by row
+class GreedyPolicyTable:
+    def __init__(self, q_table, n_codes=9, n_echelons=4, action_range=4):
+        """
+        q_table is a DenseQTable or a dict of coded state -> Q-value array. Rows of states
+        that were never visited keep the no-adjustment action [0, 0, 0, 0].
+        """
+        self.q_table = q_table
+        self.n_codes = n_codes
+        self.n_echelons = n_echelons
+        self.action_shape = (action_range,) * n_echelons
+        self.n_states = n_codes ** n_echelons
+
+        self.actions = np.zeros((self.n_states, n_echelons), dtype=np.int16)
+        self.stale = np.zeros(self.n_states, dtype=bool)
+
+        if isinstance(q_table, DenseQTable):
+            self._refresh(np.arange(self.n_states))
+        else:
+            self._refresh(np.array([self.state_index(coded_state) for coded_state in q_table], dtype=np.int64))
+
+    def state_index(self, coded_state):
+        return state_index(coded_state, self.n_codes)
+
+    def _refresh(self, indices):
+        if len(indices) == 0:
+            return
+        if isinstance(self.q_table, DenseQTable):
+            best = self.q_table.values[indices].argmax(axis=1)
+        else:
+            codes = np.stack(np.unravel_index(indices, (self.n_codes,) * self.n_echelons), axis=1) + 1
+            best = np.zeros(len(indices), dtype=np.int64)
+            for i, coded_state in enumerate(map(tuple, codes.tolist())):
+                q_values = self.q_table.get(coded_state)
+                if q_values is not None:
+                    best[i] = np.argmax(q_values)
+        self.actions[indices] = np.stack(np.unravel_index(best, self.action_shape), axis=1)
+        self.stale[indices] = False
+
+    def invalidate(self, state_index):
+        # Called when the Q-values of a state change; the row is recomputed on its next lookup
+        self.stale[state_index] = True
+
+    def lookup(self, state_index):
+        if self.stale[state_index]:
+            self._refresh(np.array([state_index]))
+        return self.actions[state_index].tolist()
+
+    def lookup_batch(self, state_indices):
+        # (N,) packed state indices -> (N, echelons) int64 actions
+        stale = state_indices[self.stale[state_indices]]
+        if len(stale):
+            self._refresh(np.unique(stale))
+        return self.actions[state_indices].astype(np.int64)
+
+    def table(self):
+        # (n_states, echelons) actions with every stale row recomputed
+        self._refresh(np.flatnonzero(self.stale))
+        return self.actions
+
+    def to_dict(self):
+        # Same layout as RLOrderingMechanism.get_optimal_policy, for every state
+        self.table()
+        codes = np.stack(np.unravel_index(np.arange(self.n_states), (self.n_codes,) * self.n_echelons), axis=1) + 1
+        return {tuple(coded_state): actions for coded_state, actions in zip(codes.tolist(), self.actions.tolist())}
@@ -1,27 +1,52 @@
 # Reinforcement Learning Ordering Mechanism for supply chain management
-import pandas as np
+import json
 import numpy as np
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
 
+from src.agents.base import Policy
+from src.agents.q_table import DenseQTable, GreedyPolicyTable
+from src.utils.profiling import instrumentation
 
-class RLOrderingMechanism:
-    def __init__(self, env, learning_rate=0.17, discount_factor=1.0, action_range=4):
+# Version of the .npz checkpoint layout written by RLOrderingMechanism.save
+CHECKPOINT_VERSION = 1
+
+
+class RLOrderingMechanism(Policy):
+    supports_batch = True
+
+    def __init__(self, env, learning_rate=0.17, discount_factor=1.0, action_range=4, dense=False):
         
         self.env = env
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.action_range = action_range
+        # dense=True keeps the Q-table in one float32[n_states, n_actions] array
+        self.dense = dense
         
-        # Initialize Q-table 
-        self.q_table = defaultdict(lambda: np.zeros((action_range, action_range, action_range, action_range)))
+        # Initialize Q-table (partial instead of a lambda so the table can be pickled)
+        self.q_table = self._new_q_table()
+        # Greedy actions compiled from q_table, built on first use
+        self._greedy = None
         
         self.episode_rewards = []
         
+    def _new_q_table(self):
+        action_range = self.action_range
+        if self.dense:
+            return DenseQTable(n_codes=self.env.n_state_codes, action_range=action_range)
+        return defaultdict(partial(np.zeros, (action_range, action_range, action_range, action_range)))
+
     def choose_action(self, state, exploration_prob):
         coded_state = self.env.code_state(state)
         
         if np.random.random() < exploration_prob:
             return [np.random.randint(0, self.action_range) for _ in range(4)]
+        elif self.dense:
+            state_index = self.q_table.state_index(coded_state)
+            return self.q_table.decode_action(self.q_table.greedy_action_index(state_index))
         else:
             # choose the best action based on Q-values
             q_values = self.q_table[coded_state]
@@ -31,6 +56,20 @@ class RLOrderingMechanism:
     def update_q_table(self, state, action, reward, next_state):
         coded_state = self.env.code_state(state)
         coded_next_state = self.env.code_state(next_state)
+
+        if self.dense:
+            q_table = self.q_table
+            state_index = q_table.state_index(coded_state)
+            action_index = q_table.action_index(action)
+            next_max_q = q_table.max_value(q_table.state_index(coded_next_state))
+            current_q = q_table.values[state_index, action_index]
+            q_table.values[state_index, action_index] = current_q + self.learning_rate * (
+                reward + self.discount_factor * next_max_q - current_q
+            )
+            q_table.visited[state_index] = True
+            if self._greedy is not None:
+                self._greedy.invalidate(state_index)
+            return
         
         # Get current Q-value
         current_q = self.q_table[coded_state][tuple(action)]
@@ -41,9 +80,12 @@ class RLOrderingMechanism:
         new_q = current_q + self.learning_rate * (reward + self.discount_factor * next_max_q - current_q)
         
         self.q_table[coded_state][tuple(action)] = new_q
+        if self._greedy is not None:
+            self._greedy.invalidate(self.env.state_index(coded_state))
 
     
-    def train(self, episodes=500, max_steps=35, initial_exploration=0.98, final_exploration=0.1):
+    @instrumentation.timed("rlom.train")
+    def train(self, episodes=500, max_steps=35, initial_exploration=0.98, final_exploration=0.1, verbose=True):
         for episode in range(episodes):
             # Reset environment
             state = self.env.reset()
@@ -58,23 +100,112 @@ class RLOrderingMechanism:
                 
                 # Adjust exploration probability within episode 
                 step_exploration = exploration_prob - step * (exploration_prob - 0.02) / max_steps
-                action = self.choose_action(state, step_exploration)
-                next_state, reward, done, _ = self.env.step(action)
+                with instrumentation.phase("rlom.choose_action"):
+                    action = self.choose_action(state, step_exploration)
+                with instrumentation.phase("env.step"):
+                    next_state, reward, done, _ = self.env.step(action)
+                instrumentation.count("env.steps")
                 
-                self.update_q_table(state, action, reward, next_state)
+                with instrumentation.phase("rlom.update_q_table"):
+                    self.update_q_table(state, action, reward, next_state)
                 
                 state = next_state
                 total_reward += reward
             
             self.episode_rewards.append(total_reward)
+            instrumentation.count("rlom.episodes")
             
             # Print every 50 episodes
-            if (episode + 1) % 50 == 0:
+            if verbose and (episode + 1) % 50 == 0:
                 print(f"Episode: {episode + 1}/{episodes}, Total Reward: {total_reward}, Total Cost: {-total_reward}")
         
         return self.episode_rewards
+
+    def train_parallel(self, seeds=range(8), workers=None, scenarios=None, merge=None, **train_kwargs):
+        """
+        Trains one independent learner per (scenario, seed) pair in a process pool.
+        scenarios is a list of SupplyChainEnvironment keyword dicts (customer_demand, lead_times,
+        time_horizon); by default every learner uses the scenario of self.env. Learners use the
+        state coding and cost parameters of self.env unless a scenario sets its own.
+        Returns one result dict per learner with its seed, scenario, visited Q-table,
+        episode rewards and greedy evaluation cost. With merge="mean" or merge="best"
+        the learners' tables are combined into self.q_table.
+        """
+        if scenarios is None:
+            scenarios = [{
+                "customer_demand": self.env.customer_demand,
+                "lead_times": self.env.lead_times,
+                "time_horizon": self.env.time_horizon,
+            }]
+        # The merged tables must share self.env's state coding and objective
+        env_kwargs = {
+            "bucket_edges": self.env.bucket_edges,
+            "holding_cost": self.env.holding_cost,
+            "backlog_cost": self.env.backlog_cost,
+        }
+        scenarios = [dict(env_kwargs, **scenario) for scenario in scenarios]
+        agent_kwargs = {
+            "learning_rate": self.learning_rate,
+            "discount_factor": self.discount_factor,
+            "action_range": self.action_range,
+            "dense": self.dense,
+        }
+        jobs = list(product(range(len(scenarios)), seeds))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_train_worker, type(self.env), scenarios[scenario], agent_kwargs, seed, train_kwargs)
+                for scenario, seed in jobs
+            ]
+            results = []
+            for (scenario, seed), future in zip(jobs, futures):
+                q_table, episode_rewards, total_cost = future.result()
+                results.append({
+                    "seed": seed,
+                    "scenario": scenario,
+                    "q_table": q_table,
+                    "episode_rewards": episode_rewards,
+                    "total_cost": total_cost,
+                })
+
+        if merge is not None:
+            self.q_table = self.merge_q_tables(results, merge)
+        return results
+
+    def merge_q_tables(self, results, strategy="mean"):
+        """
+        Combines the Q-tables returned by train_parallel.
+        "mean" averages each state over the learners that visited it,
+        "best" keeps the table of the learner with the lowest evaluation cost.
+        """
+        merged = self._new_q_table()
+        if strategy == "best":
+            best = min(results, key=lambda result: result["total_cost"])
+            merged.update(best["q_table"])
+        elif strategy == "mean":
+            counts = defaultdict(int)
+            for result in results:
+                for coded_state, q_values in result["q_table"].items():
+                    merged[coded_state] += q_values
+                    counts[coded_state] += 1
+            for coded_state, count in counts.items():
+                merged[coded_state] /= count
+        else:
+            raise ValueError(f"unknown merge strategy: {strategy}")
+        return merged
     
+    def compile_policy(self):
+        """
+        Returns the GreedyPolicyTable of the current Q-table. It is built once and kept in sync
+        by update_q_table, which invalidates the rows it changes.
+        """
+        if self._greedy is None or self._greedy.q_table is not self.q_table:
+            self._greedy = GreedyPolicyTable(self.q_table, self.env.n_state_codes, 4, self.action_range)
+        return self._greedy
+
     def get_optimal_policy(self):
+        if self.dense:
+            return self.q_table.greedy_policy()
         policy = {}
         for coded_state in self.q_table:
             q_values = self.q_table[coded_state]
@@ -82,6 +213,7 @@ class RLOrderingMechanism:
             policy[coded_state] = list(best_action_index)
         return policy
     
+    @instrumentation.timed("rlom.evaluate_policy")
     def evaluate_policy(self, policy=None):
         # Reset environment
         state = self.env.reset()
@@ -89,10 +221,12 @@ class RLOrderingMechanism:
         done = False
         period_costs = []
         
+        greedy = self.compile_policy() if policy is None else None
+        
         while not done:
             if policy is None:
                 coded_state = self.env.code_state(state)
-                action = self.get_optimal_policy().get(coded_state, [0, 0, 0, 0])
+                action = greedy.lookup(self.env.state_index(coded_state))
             else:
                 coded_state = self.env.code_state(state)
                 action = policy.get(coded_state, [0, 0, 0, 0])
@@ -104,45 +238,76 @@ class RLOrderingMechanism:
             period_costs.append(info["period_cost"])
         
         return -total_reward, period_costs
-    
-    def evaluate(self):
-        state = self.env.reset()
-        total_reward = 0
-        done = False
 
-        # Initialize logging structures
-        inventory_history = [[], [], [], []]
-        order_history = [[], [], [], []]
-        period_costs = []
+    def save(self, path):
+        """
+        Writes the visited Q-table rows to an uncompressed .npz checkpoint: packed state indices,
+        an (n_visited, n_actions) value array in the table's precision and a JSON header with
+        the hyperparameters and state-coding config.
+        """
+        coded_states = list(self.q_table)
+        n_actions = self.action_range ** 4
+        header = {
+            "version": CHECKPOINT_VERSION,
+            "learning_rate": self.learning_rate,
+            "discount_factor": self.discount_factor,
+            "action_range": self.action_range,
+            "dense": self.dense,
+            "bucket_edges": list(self.env.bucket_edges),
+        }
+        states = np.array([self.env.state_index(coded_state) for coded_state in coded_states], dtype=np.int64)
+        q_values = np.zeros((len(coded_states), n_actions), dtype=np.float32 if self.dense else np.float64)
+        for i, coded_state in enumerate(coded_states):
+            q_values[i] = np.reshape(self.q_table[coded_state], n_actions)
 
-        # Get optimal action policy from Q-table
-        optimal_policy = self.get_optimal_policy()
+        with open(path, "wb") as f:
+            np.savez(f, header=np.array(json.dumps(header)), states=states, q_values=q_values)
 
-        while not done:
-            # Determine action from policy
-            coded_state = self.env.code_state(state)
-            action = optimal_policy.get(coded_state, [0, 0, 0, 0])  # fallback: no adjustment
+    @classmethod
+    def load(cls, path, env):
+        # Rebuilds a trained agent from a save() checkpoint, ready for evaluation
+        with np.load(path) as checkpoint:
+            header = json.loads(str(checkpoint["header"]))
+            states = checkpoint["states"]
+            q_values = checkpoint["q_values"]
 
-            # Environment step
-            next_state, reward, done, info = self.env.step(action)
+        if header["version"] != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported checkpoint version {header['version']}")
+        if tuple(header["bucket_edges"]) != tuple(env.bucket_edges):
+            raise ValueError(f"checkpoint was trained with bucket_edges={header['bucket_edges']}, env uses {env.bucket_edges}")
 
-            # Log inventory and order data for each level
-            for i in range(4):
-                inventory_history[i].append(self.env.inventory_position[i])
-                order_history[i].append(self.env.orders_received[i])
+        agent = cls(env, header["learning_rate"], header["discount_factor"], header["action_range"], header["dense"])
+        if agent.dense:
+            agent.q_table.values[states] = q_values
+            agent.q_table.visited[states] = True
+        else:
+            shape = (agent.action_range,) * 4
+            codes = np.stack(np.unravel_index(states, (env.n_state_codes,) * 4), axis=1) + 1
+            for coded_state, row in zip(codes.tolist(), q_values):
+                agent.q_table[tuple(coded_state)] = row.reshape(shape)
+        return agent
 
-            # Log cost for this period
-            period_costs.append(info["period_cost"])
+    def reset(self):
+        self.compile_policy()
 
-            # Advance to next state
-            state = next_state
-            total_reward += reward
+    def fingerprint(self):
+        # The greedy action table fully determines the evaluated policy
+        return self._digest(self.env.bucket_edges, self.compile_policy().table().tobytes())
+
+    def act(self, state, env_view):
+        # Unvisited states fall back to no adjustment
+        coded_state = env_view.code_state(state)
+        return self.compile_policy().lookup(env_view.state_index(coded_state))
+
+    def act_batch(self, states, env_view):
+        return self.compile_policy().lookup_batch(env_view.get_coded_states())
 
-        # Package log for visualization
-        log = {
-            "inventory_history": inventory_history,
-            "order_history": order_history,
-            "period_costs": period_costs
-        }
 
-        return -total_reward, log  # Return total cost (positive value) and log
+def _train_worker(env_class, env_kwargs, agent_kwargs, seed, train_kwargs):
+    # Runs in a worker process: one environment and one learner per seed
+    np.random.seed(seed)
+    agent = RLOrderingMechanism(env_class(**env_kwargs), **agent_kwargs)
+    episode_rewards = agent.train(verbose=False, **train_kwargs)
+    total_cost, _ = agent.evaluate_policy()
+    # Only the visited states are sent back, as a plain dict
+    return dict(agent.q_table), episode_rewards, total_cost
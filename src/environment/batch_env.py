@@ -0,0 +1,190 @@
+import numpy as np
+
+from src.environment.supply_chain_env import (
+    DEFAULT_BACKLOG_COST, DEFAULT_BUCKET_EDGES, DEFAULT_CUSTOMER_DEMAND, DEFAULT_HOLDING_COST, DEFAULT_LEAD_TIMES, code_states,
+    cost_dtype,
+)
+
+
+# Batched Beer Game: N independent games of SupplyChainEnvironment stepped together with NumPy
+class BatchSupplyChainEnvironment:
+    def __init__(self, num_envs, customer_demand=None, lead_times=None, time_horizon=35,
+                 max_lead_time=None, record_history=False, bucket_edges=DEFAULT_BUCKET_EDGES,
+                 holding_cost=None, backlog_cost=None, metrics=None):
+        """
+        customer_demand and lead_times may be a single sequence shared by all games
+        or a (num_envs, time_horizon) matrix with one row per game. holding_cost and
+        backlog_cost may be scalars or one value per game. max_lead_time defaults to the
+        longest lead time and must not be shorter. metrics is an optional
+        StreamingMetrics(num_envs) updated at every step.
+        """
+        if customer_demand is None:
+            customer_demand = DEFAULT_CUSTOMER_DEMAND
+        if lead_times is None:
+            lead_times = DEFAULT_LEAD_TIMES
+
+        self.num_envs = num_envs
+        self.time_horizon = time_horizon
+        self.customer_demand = self._as_matrix(customer_demand)
+        self.lead_times = self._as_matrix(lead_times)
+
+        # Shipments with lead time 0 arrive in the next period, same as the per-game environment
+        self.effective_lead_times = np.maximum(self.lead_times, 1)
+        longest = int(self.effective_lead_times[:, :time_horizon].max(initial=1))
+        if max_lead_time is None:
+            max_lead_time = longest
+        elif longest > max_lead_time:
+            # Arrivals would wrap onto slots that were not read yet
+            raise ValueError(f"lead time {longest} exceeds max_lead_time={max_lead_time}")
+        # Two slots are needed for the initial pipeline
+        self.max_lead_time = max(max_lead_time, 1)
+        self.num_slots = self.max_lead_time + 1
+
+        # Cost parameters
+        self.holding_cost = DEFAULT_HOLDING_COST if holding_cost is None else holding_cost
+        self.backlog_cost = DEFAULT_BACKLOG_COST if backlog_cost is None else backlog_cost
+
+        self.bucket_edges = tuple(bucket_edges)
+        self.n_state_codes = len(self.bucket_edges) + 1
+
+        self.record_history = record_history
+        self.metrics = metrics
+        self._rows = np.arange(num_envs)
+        self.reset()
+
+    @classmethod
+    def from_env(cls, env, num_envs, **kwargs):
+        """
+        num_envs games of the scenario of env, a SupplyChainEnvironment: its customer demand,
+        lead times, horizon, state coding and costs. Games read the first time_horizon values
+        of each series, so streamed sources work too. Other keyword arguments are passed on.
+        """
+        horizon = env.time_horizon
+        return cls(
+            num_envs,
+            customer_demand=env.customer_demand[:horizon],
+            lead_times=env.lead_times[:horizon],
+            time_horizon=horizon,
+            bucket_edges=env.bucket_edges,
+            holding_cost=env.holding_cost,
+            backlog_cost=env.backlog_cost,
+            **kwargs,
+        )
+
+    @classmethod
+    def from_envs(cls, envs, **kwargs):
+        # One game per environment, like from_env; envs must share a horizon and a state coding
+        horizon = envs[0].time_horizon
+        return cls(
+            len(envs),
+            customer_demand=[env.customer_demand[:horizon] for env in envs],
+            lead_times=[env.lead_times[:horizon] for env in envs],
+            time_horizon=horizon,
+            bucket_edges=envs[0].bucket_edges,
+            holding_cost=np.array([env.holding_cost for env in envs]),
+            backlog_cost=np.array([env.backlog_cost for env in envs]),
+            **kwargs,
+        )
+
+    def _as_matrix(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        if values.ndim == 1:
+            values = np.broadcast_to(values, (self.num_envs, values.shape[0]))
+        if values.shape[0] != self.num_envs or values.shape[1] < self.time_horizon:
+            raise ValueError(
+                f"expected a sequence or a ({self.num_envs}, >={self.time_horizon}) matrix, got {values.shape}"
+            )
+        return values
+
+    def reset(self):
+        n = self.num_envs
+
+        # Initial inventories: [retailer, distributor, manufacturer, supplier]
+        self.inventory_position = np.full((n, 4), 12, dtype=np.int64)
+
+        # Ring buffer of in-transit stock indexed by arrival period modulo num_slots.
+        # The initial [[4, 1], [4, 2]] pipeline arrives in periods 0 and 1.
+        self.pipeline = np.zeros((n, 4, self.num_slots), dtype=np.int64)
+        self.pipeline[:, :, 0] = 4
+        self.pipeline[:, :, 1] = 4
+
+        self.current_time = 0
+        self.orders_received = np.zeros((n, 4), dtype=np.int64)
+        dtype = cost_dtype(self.holding_cost, self.backlog_cost)
+        self.total_cost = np.zeros(n, dtype=dtype)
+
+        if self.record_history:
+            self.inventory_history = np.zeros((n, self.time_horizon, 4), dtype=np.int64)
+            self.order_history = np.zeros((n, self.time_horizon, 4), dtype=np.int64)
+            self.period_costs = np.zeros((n, self.time_horizon), dtype=dtype)
+
+        if self.metrics is not None:
+            self.metrics.start_episode()
+
+        return self.get_state()
+
+    def get_state(self):
+        return self.inventory_position.copy()
+
+    def get_coded_states(self):
+        # Packed state index per game, see code_states
+        return code_states(self.inventory_position, self.bucket_edges)
+
+    def calculate_cost(self):
+        # Echelon costs are added from the retailer up like in SupplyChainEnvironment, so
+        # fractional costs round the same way
+        inventory = self.inventory_position
+        holding = np.reshape(self.holding_cost, (-1, 1))
+        backlog = np.reshape(self.backlog_cost, (-1, 1))
+        costs = np.where(inventory > 0, holding * inventory, backlog * -inventory)
+        return costs[:, 0] + costs[:, 1] + costs[:, 2] + costs[:, 3]
+
+    def step(self, actions):
+        """
+        Advances every game by one period. actions has shape (num_envs, 4).
+        Returns (states, rewards, done, info) where done is shared by all games.
+        """
+        t = self.current_time
+        if t >= self.time_horizon:
+            return self.get_state(), np.zeros_like(self.total_cost), True, {}
+
+        actions = np.asarray(actions, dtype=np.int64)
+        customer_demand = self.customer_demand[:, t]
+        lead_time = self.effective_lead_times[:, t]
+        arrival_slot = (t + lead_time) % self.num_slots
+
+        # Process incoming goods: read and clear the slot that arrives this period
+        slot = t % self.num_slots
+        self.inventory_position += self.pipeline[:, :, slot]
+        self.pipeline[:, :, slot] = 0
+
+        # Process orders from downstream
+        self.orders_received[:, 0] = customer_demand
+        orders = self.orders_received
+        inventory = self.inventory_position
+        shipped = np.where(inventory >= orders, orders, np.maximum(inventory, 0))
+        if self.metrics is not None:
+            received = orders.copy()
+        # Whatever could not be shipped is backlogged
+        self.inventory_position -= orders
+        # Echelon i ships to echelon i - 1; the retailer ships to the customer
+        self.pipeline[self._rows, :3, arrival_slot] += shipped[:, 1:]
+
+        # Place upstream orders: each order is the downstream order plus the adjustment
+        placed = customer_demand[:, None] + np.cumsum(actions, axis=1)
+        self.orders_received[:, 1:] = placed[:, :3]
+        self.pipeline[self._rows, 3, arrival_slot] += placed[:, 3]
+
+        cost = self.calculate_cost()
+        self.total_cost += cost
+
+        if self.metrics is not None:
+            self.metrics.update(customer_demand, received, placed, self.inventory_position)
+
+        if self.record_history:
+            self.inventory_history[:, t] = self.inventory_position
+            self.order_history[:, t] = self.orders_received
+            self.period_costs[:, t] = cost
+
+        self.current_time += 1
+        return self.get_state(), -cost, self.current_time >= self.time_horizon, {"period_cost": cost}
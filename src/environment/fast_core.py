@@ -0,0 +1,152 @@
+import numpy as np
+
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.supply_chain_env import DEFAULT_BUCKET_EDGES, code_states, cost_dtype
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# True when the episode kernel is compiled with Numba; otherwise simulate_action_table
+# runs the same games through BatchSupplyChainEnvironment
+NUMBA_AVAILABLE = numba is not None
+
+
+def _jit(function):
+    if numba is None:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@_jit
+def _simulate_kernel(action_table, demand, lead_times, holding_cost, backlog_cost, bucket_edges, num_slots,
+                     period_costs):
+    """
+    Plays every game with the SupplyChainEnvironment step rules and writes the cost of each
+    period into period_costs (N, T). Actions are looked up in action_table by the packed
+    state index of the inventories at the start of the period.
+    """
+    n_games, horizon = period_costs.shape
+    n_codes = len(bucket_edges) + 1
+    inventory = np.empty(4, dtype=np.int64)
+    orders_received = np.empty(4, dtype=np.int64)
+    pipeline = np.empty((4, num_slots), dtype=np.int64)
+
+    for g in range(n_games):
+        inventory[:] = 12
+        orders_received[:] = 0
+        pipeline[:, :] = 0
+        pipeline[:, 0] = 4
+        pipeline[:, 1] = 4
+
+        for t in range(horizon):
+            state_index = 0
+            for i in range(4):
+                code = 0
+                for edge in bucket_edges:
+                    if inventory[i] >= edge:
+                        code += 1
+                state_index = state_index * n_codes + code
+
+            customer_demand = demand[g, t]
+            arrival_slot = (t + max(lead_times[g, t], 1)) % num_slots
+            slot = t % num_slots
+
+            # Incoming goods
+            for i in range(4):
+                inventory[i] += pipeline[i, slot]
+                pipeline[i, slot] = 0
+
+            # Ship what is on hand; the rest of the order is backlogged
+            orders_received[0] = customer_demand
+            for i in range(4):
+                order = orders_received[i]
+                shipped = order if inventory[i] >= order else max(inventory[i], 0)
+                inventory[i] -= order
+                if i > 0:
+                    pipeline[i - 1, arrival_slot] += shipped
+
+            # Orders cascade from the retailer up to the supplier's production
+            orders_received[1] = customer_demand + action_table[state_index, 0]
+            orders_received[2] = orders_received[1] + action_table[state_index, 1]
+            orders_received[3] = orders_received[2] + action_table[state_index, 2]
+            pipeline[3, arrival_slot] += orders_received[3] + action_table[state_index, 3]
+
+            cost = holding_cost[g] * 0
+            for i in range(4):
+                if inventory[i] > 0:
+                    cost += holding_cost[g] * inventory[i]
+                else:
+                    cost += backlog_cost[g] * -inventory[i]
+            period_costs[g, t] = cost
+
+
+def _simulate_batch_env(action_table, demand, lead_times, holding_cost, backlog_cost, bucket_edges, num_slots,
+                        period_costs):
+    # Pure NumPy path with the same signature as _simulate_kernel
+    n_games, horizon = period_costs.shape
+    env = BatchSupplyChainEnvironment(
+        n_games,
+        customer_demand=demand,
+        lead_times=lead_times,
+        time_horizon=horizon,
+        max_lead_time=num_slots - 1,
+        bucket_edges=bucket_edges,
+        holding_cost=holding_cost,
+        backlog_cost=backlog_cost,
+    )
+    states = env.reset()
+    for t in range(horizon):
+        actions = action_table[code_states(states, bucket_edges)]
+        states, _, _, info = env.step(actions.astype(np.int64))
+        period_costs[:, t] = info["period_cost"]
+
+
+def simulate_action_table(action_table, customer_demand, lead_times, time_horizon=None, holding_cost=1,
+                          backlog_cost=2, bucket_edges=DEFAULT_BUCKET_EDGES, backend="auto"):
+    """
+    Runs whole episodes of a state-indexed policy, e.g. RLOrderingMechanism.compile_policy().table(),
+    an (n_codes ** 4, 4) array of actions by packed state index.
+    customer_demand and lead_times are one sequence or a (N, T) matrix of games; costs may be
+    scalars or one value per game. backend is "numba", "python" (BatchSupplyChainEnvironment)
+    or "auto", which uses Numba when it is installed.
+    Returns (total_cost (N,), period_costs (N, T)), identical to SupplyChainEnvironment on both
+    backends: costs are added in the environment's order, so fractional costs round the same way.
+    """
+    demand = np.atleast_2d(np.asarray(customer_demand, dtype=np.int64))
+    lead_times = np.atleast_2d(np.asarray(lead_times, dtype=np.int64))
+    n_games = max(len(demand), len(lead_times))
+    if time_horizon is None:
+        time_horizon = min(demand.shape[1], lead_times.shape[1])
+    demand = np.ascontiguousarray(np.broadcast_to(demand[:, :time_horizon], (n_games, time_horizon)))
+    lead_times = np.ascontiguousarray(np.broadcast_to(lead_times[:, :time_horizon], (n_games, time_horizon)))
+
+    dtype = cost_dtype(holding_cost, backlog_cost)
+    holding_cost = np.ascontiguousarray(np.broadcast_to(np.asarray(holding_cost, dtype=dtype), n_games))
+    backlog_cost = np.ascontiguousarray(np.broadcast_to(np.asarray(backlog_cost, dtype=dtype), n_games))
+
+    edges = np.asarray(bucket_edges)
+    n_states = (len(edges) + 1) ** 4
+    action_table = np.ascontiguousarray(action_table, dtype=np.int64)
+    if action_table.shape != (n_states, 4):
+        raise ValueError(f"action_table must have shape ({n_states}, 4), got {action_table.shape}")
+
+    num_slots = max(int(np.maximum(lead_times, 1).max(initial=1)), 1) + 1
+    period_costs = np.zeros((n_games, time_horizon), dtype=dtype)
+
+    if backend == "auto":
+        backend = "numba" if NUMBA_AVAILABLE else "python"
+    if backend == "numba":
+        if not NUMBA_AVAILABLE:
+            raise ImportError("backend='numba' requires numba (pip install numba)")
+        _simulate_kernel(action_table, demand, lead_times, holding_cost, backlog_cost, edges, num_slots, period_costs)
+    elif backend == "python":
+        _simulate_batch_env(action_table, demand, lead_times, holding_cost, backlog_cost, tuple(bucket_edges),
+                            num_slots, period_costs)
+    else:
+        raise ValueError(f"unknown backend: {backend!r}")
+
+    # Accumulated period by period like SupplyChainEnvironment.total_cost, so float costs match bit for bit
+    total_cost = period_costs.cumsum(axis=1)[:, -1] if time_horizon else np.zeros(n_games, dtype=dtype)
+    return total_cost, period_costs
@@ -0,0 +1,73 @@
+import numpy as np
+
+from src.environment.supply_chain_env import SupplyChainEnvironment
+
+# Gymnasium is preferred (stable-baselines3 >= 2.0 uses it); gym >= 0.26 has the same API
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError:
+    try:
+        import gym
+        from gym import spaces
+    except ImportError:
+        gym = None
+        spaces = None
+
+# Action encodings of BeerGameEnv
+ACTION_MODES = ("multi_discrete", "discrete")
+
+
+# Gym/Gymnasium interface to SupplyChainEnvironment: reset() -> (obs, info),
+# step() -> (obs, reward, terminated, truncated, info)
+class BeerGameEnv(gym.Env if gym is not None else object):
+    metadata = {"render_modes": []}
+
+    def __init__(self, env_kwargs=None, scenario_fn=None, action_range=4, action_mode="multi_discrete",
+                 reward_scale=1.0):
+        """
+        env_kwargs are passed to SupplyChainEnvironment. scenario_fn, if given, is called with
+        the env's np_random generator at every reset and returns fresh env_kwargs, so each
+        episode can play a different demand and lead-time scenario.
+        action_mode "multi_discrete" takes one adjustment in [0, action_range) per echelon;
+        "discrete" takes a single index over all action_range ** 4 combinations, like DQNPolicy.
+        Observations are the four inventory positions as float32.
+        """
+        if gym is None:
+            raise ImportError("BeerGameEnv requires gymnasium or gym (pip install gymnasium)")
+        if action_mode not in ACTION_MODES:
+            raise ValueError(f"action_mode must be one of {ACTION_MODES}, got {action_mode!r}")
+
+        self.env_kwargs = dict(env_kwargs or {}, record="none")
+        self.scenario_fn = scenario_fn
+        self.action_range = action_range
+        self.action_mode = action_mode
+        self.action_shape = (action_range,) * 4
+        self.reward_scale = reward_scale
+        self.env = SupplyChainEnvironment(**self.env_kwargs)
+
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(4,), dtype=np.float32)
+        if action_mode == "discrete":
+            self.action_space = spaces.Discrete(action_range ** 4)
+        else:
+            self.action_space = spaces.MultiDiscrete([action_range] * 4)
+
+    def _observation(self, state):
+        return np.asarray(state, dtype=np.float32)
+
+    def decode_action(self, action):
+        if self.action_mode == "discrete":
+            return [int(a) for a in np.unravel_index(int(action), self.action_shape)]
+        return [int(a) for a in action]
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        if self.scenario_fn is not None:
+            self.env = SupplyChainEnvironment(**dict(self.scenario_fn(self.np_random), record="none"))
+        state = self.env.reset()
+        return self._observation(state), {}
+
+    def step(self, action):
+        state, reward, done, info = self.env.step(self.decode_action(action))
+        # The horizon is part of the game, so its end is a termination, not a truncation
+        return self._observation(state), float(reward) * self.reward_scale, done, False, info
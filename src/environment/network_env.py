@@ -0,0 +1,232 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from src.environment.supply_chain_env import (
+    DEFAULT_BACKLOG_COST, DEFAULT_BUCKET_EDGES, DEFAULT_CUSTOMER_DEMAND, DEFAULT_HOLDING_COST, DEFAULT_LEAD_TIMES, code_states,
+    cost_dtype, state_index,
+)
+
+
+def tree_parents(branching):
+    """
+    Parent array of a tree where every node at depth k has branching[k] children, with the
+    root at depth 0. Nodes are numbered deepest level first and the root last, so
+    tree_parents((1, 1, 1)) is the classic line [1, 2, 3, -1] (retailer ... supplier).
+    """
+    levels = [[-1]]
+    for children in branching:
+        levels.append([parent for parent in range(len(levels[-1])) for _ in range(children)])
+
+    # Number the levels from the deepest one up and translate parent positions into node ids
+    offsets = np.cumsum([0] + [len(level) for level in reversed(levels)])
+    parents = []
+    for depth in range(len(levels) - 1, -1, -1):
+        parent_offset = offsets[len(levels) - depth] if depth > 0 else 0
+        parents.extend(-1 if parent < 0 else int(parent_offset + parent) for parent in levels[depth])
+    return parents
+
+
+# Supply network of any number of tiers where every node orders from one parent and may
+# supply several children. Retailers (nodes without children) see customer demand and
+# roots produce. With parents [1, 2, 3, -1] it is the classic 4-tier beer game.
+class SupplyNetworkEnvironment:
+    def __init__(self, parents, customer_demand=None, lead_times=None, time_horizon=35, max_lead_time=None,
+                 initial_inventory=12, initial_pipeline=(4, 4), bucket_edges=DEFAULT_BUCKET_EDGES,
+                 record_history=False, holding_cost=DEFAULT_HOLDING_COST, backlog_cost=DEFAULT_BACKLOG_COST):
+        """
+        parents[i] is the node that supplies node i, or -1 for a producing root.
+        customer_demand is one sequence shared by all retailers or one row per retailer
+        (in node order). lead_times is one sequence shared by all nodes or one row per node.
+        initial_inventory and the costs may be scalars or one value per node.
+        """
+        self.parents = np.asarray(parents, dtype=np.int64)
+        self.num_nodes = len(self.parents)
+        self.time_horizon = time_horizon
+        self._build_topology()
+
+        if customer_demand is None:
+            customer_demand = DEFAULT_CUSTOMER_DEMAND
+        if lead_times is None:
+            lead_times = DEFAULT_LEAD_TIMES
+        self.customer_demand = self._as_rows(customer_demand, len(self.retailers), "customer_demand")
+        self.lead_times = self._as_rows(lead_times, self.num_nodes, "lead_times")
+
+        # Shipments with lead time 0 arrive in the next period, as in SupplyChainEnvironment
+        self.effective_lead_times = np.maximum(self.lead_times, 1)
+        longest = int(self.effective_lead_times[:, :time_horizon].max(initial=1))
+        if max_lead_time is None:
+            max_lead_time = longest
+        elif longest > max_lead_time:
+            # Arrivals would wrap onto slots that were not read yet
+            raise ValueError(f"lead time {longest} exceeds max_lead_time={max_lead_time}")
+        self.max_lead_time = max(max_lead_time, 1)
+        self.num_slots = self.max_lead_time + 1
+
+        self.initial_inventory = np.broadcast_to(np.asarray(initial_inventory, dtype=np.int64), self.num_nodes).copy()
+        self.initial_pipeline = tuple(initial_pipeline)
+        if len(self.initial_pipeline) > self.num_slots:
+            raise ValueError(f"initial_pipeline needs at most {self.num_slots} periods, got {len(self.initial_pipeline)}")
+
+        # Cost parameters, scalars or one value per node
+        self.holding_cost = holding_cost
+        self.backlog_cost = backlog_cost
+
+        self.bucket_edges = tuple(bucket_edges)
+        self.n_state_codes = len(self.bucket_edges) + 1
+
+        self.record_history = record_history
+        self.reset()
+
+    def _build_topology(self):
+        """
+        Precomputes the arrays step() works on: the levels of the cascade (deepest first) and
+        the supply edges grouped by parent, so every period costs O(nodes + edges) NumPy work.
+        """
+        parents = self.parents
+        n = self.num_nodes
+        if np.any((parents < -1) | (parents >= n)) or np.any(parents == np.arange(n)):
+            raise ValueError("parents must hold node indices or -1")
+
+        depth = np.full(n, -1, dtype=np.int64)
+        depth[parents == -1] = 0
+        for _ in range(n):
+            unresolved = (depth < 0) & (depth[parents] >= 0) & (parents >= 0)
+            if not unresolved.any():
+                break
+            depth[unresolved] = depth[parents[unresolved]] + 1
+        if np.any(depth < 0):
+            raise ValueError("parents must form a forest: every node needs a path to a root")
+        self.depth = depth
+
+        self.roots = np.flatnonzero(parents == -1)
+        has_children = np.zeros(n, dtype=bool)
+        has_children[parents[parents >= 0]] = True
+        self.retailers = np.flatnonzero(~has_children)
+        self.levels = [np.flatnonzero(depth == d) for d in range(depth.max(), -1, -1)]
+
+        # Supply edges sorted by parent, children in node order: the allocation order of stock
+        children = np.flatnonzero(parents >= 0)
+        order = np.argsort(parents[children], kind="stable")
+        self.edge_children = children[order]
+        self.edge_parents = parents[self.edge_children]
+        starts = np.ones(len(self.edge_parents), dtype=bool)
+        starts[1:] = self.edge_parents[1:] != self.edge_parents[:-1]
+        self._edge_group_start = np.maximum.accumulate(np.where(starts, np.arange(len(starts)), 0))
+
+    def _as_rows(self, values, rows, name):
+        values = np.asarray(values, dtype=np.int64)
+        if values.ndim == 1:
+            values = np.broadcast_to(values, (rows, values.shape[0]))
+        if values.shape[0] != rows or values.shape[1] < self.time_horizon:
+            raise ValueError(f"{name}: expected a sequence or a ({rows}, >={self.time_horizon}) matrix, got {values.shape}")
+        return values
+
+    @classmethod
+    def beer_game(cls, **kwargs):
+        # The 4-tier line [retailer, distributor, manufacturer, supplier] of SupplyChainEnvironment
+        return cls(tree_parents((1, 1, 1)), **kwargs)
+
+    @classmethod
+    def tree(cls, branching, **kwargs):
+        # e.g. tree((2, 3)): one factory, two distributors, three retailers per distributor
+        return cls(tree_parents(branching), **kwargs)
+
+    def reset(self):
+        n = self.num_nodes
+        self.inventory_position = self.initial_inventory.copy()
+
+        # Ring buffer of in-transit stock per node, indexed by arrival period modulo num_slots
+        self.pipeline = np.zeros((n, self.num_slots), dtype=np.int64)
+        for period, amount in enumerate(self.initial_pipeline):
+            self.pipeline[:, period] = amount
+
+        self.current_time = 0
+        # Orders received from downstream (customer demand for retailers) and orders placed upstream
+        self.orders_received = np.zeros(n, dtype=np.int64)
+        self.orders_placed = np.zeros(n, dtype=np.int64)
+        dtype = cost_dtype(self.holding_cost, self.backlog_cost)
+        self.total_cost = dtype.type(0)
+
+        if self.record_history:
+            self.inventory_history = np.zeros((self.time_horizon, n), dtype=np.int64)
+            self.order_history = np.zeros((self.time_horizon, n), dtype=np.int64)
+            self.period_costs = np.zeros(self.time_horizon, dtype=dtype)
+
+        return self.get_state()
+
+    def get_state(self):
+        return self.inventory_position.copy()
+
+    def code_state(self, state):
+        # Codes run from 1 (below the first edge) to n_state_codes, as in SupplyChainEnvironment
+        return tuple(bisect_right(self.bucket_edges, inventory) + 1 for inventory in state)
+
+    def code_states(self, states):
+        return code_states(states, self.bucket_edges)
+
+    def state_index(self, coded_state):
+        return state_index(coded_state, self.n_state_codes)
+
+    def get_coded_state(self):
+        return self.code_state(self.inventory_position)
+
+    def calculate_cost(self):
+        inventory = self.inventory_position
+        costs = np.where(inventory > 0, self.holding_cost * inventory, self.backlog_cost * -inventory)
+        return costs.sum()
+
+    def step(self, actions):
+        """
+        Advances one period. actions holds one order adjustment per node: each node orders
+        what its children (or customers) ordered this period plus its adjustment.
+        """
+        t = self.current_time
+        if t >= self.time_horizon:
+            return self.get_state(), 0, True, {}
+
+        actions = np.asarray(actions, dtype=np.int64)
+        arrival_slot = (t + self.effective_lead_times[:, t]) % self.num_slots
+
+        # Process incoming goods: read and clear the slot that arrives this period
+        slot = t % self.num_slots
+        self.inventory_position += self.pipeline[:, slot]
+        self.pipeline[:, slot] = 0
+
+        # Retailers serve this period's customer demand, other nodes last period's orders
+        self.orders_received[self.retailers] = self.customer_demand[:, t]
+        inventory = self.inventory_position
+
+        # Children are served in node order with SupplyChainEnvironment's rule: an order the
+        # remaining inventory covers ships in full (negative orders included), otherwise only
+        # the stock on hand ships and the rest is backlogged
+        edge_orders = self.orders_placed[self.edge_children]
+        before = np.cumsum(edge_orders) - edge_orders
+        before -= before[self._edge_group_start]
+        remaining = inventory[self.edge_parents] - before
+        shipped = np.where(remaining >= edge_orders, edge_orders, np.maximum(remaining, 0))
+        self.pipeline[self.edge_children, arrival_slot[self.edge_children]] += shipped
+        self.inventory_position -= self.orders_received
+
+        # Orders cascade up one level at a time, from the retailers to the roots
+        received = np.zeros(self.num_nodes, dtype=np.int64)
+        received[self.retailers] = self.customer_demand[:, t]
+        placed = self.orders_placed
+        for level in self.levels:
+            placed[level] = received[level] + actions[level]
+            has_parent = self.parents[level] >= 0
+            np.add.at(received, self.parents[level[has_parent]], placed[level[has_parent]])
+        self.orders_received = received
+        # Roots produce what they order
+        self.pipeline[self.roots, arrival_slot[self.roots]] += placed[self.roots]
+
+        cost = self.calculate_cost()
+        self.total_cost += cost
+
+        if self.record_history:
+            self.inventory_history[t] = self.inventory_position
+            self.order_history[t] = self.orders_received
+            self.period_costs[t] = cost
+
+        self.current_time += 1
+        return self.get_state(), -cost, self.current_time >= self.time_horizon, {"period_cost": cost}
@@ -0,0 +1,242 @@
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+# Subclass stable-baselines3's VecEnv when it is installed, so SB3 algorithms accept this env
+try:
+    from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+except ImportError:
+    VecEnv = None
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+
+class _Pickled:
+    # Ships env factories (often lambdas) to spawn/forkserver workers
+    def __init__(self, value):
+        self.value = value
+
+    def __getstate__(self):
+        return cloudpickle.dumps(self.value) if cloudpickle is not None else self.value
+
+    def __setstate__(self, state):
+        self.value = cloudpickle.loads(state) if isinstance(state, bytes) else state
+
+
+def _buffer(ctx, shape, dtype):
+    # Shared buffer allocated before the workers start, viewed as an array on both sides
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray("b", max(1, int(np.prod(shape)) * dtype.itemsize))
+    return raw, shape, dtype
+
+
+def _view(buffer):
+    raw, shape, dtype = buffer
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _shard_worker(remote, parent_remote, env_fns, start, buffers):
+    """
+    Runs in a worker process: steps the envs start .. start + len(env_fns) - 1 on actions read
+    from shared memory and writes observations, rewards and dones back in place. Only the
+    command and the per-env info dicts travel through the pipe.
+    """
+    parent_remote.close()
+    envs = [fn() for fn in env_fns.value]
+    observations, actions, rewards, dones = (_view(buffer) for buffer in buffers)
+    stop = start + len(envs)
+
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                infos = []
+                for j, env in enumerate(envs):
+                    i = start + j
+                    obs, reward, terminated, truncated, info = env.step(actions[i])
+                    done = terminated or truncated
+                    if done:
+                        # Same auto-reset convention as stable-baselines3's VecEnvs
+                        info = dict(info, terminal_observation=obs, **{"TimeLimit.truncated": truncated and not terminated})
+                        obs, _ = env.reset()
+                    observations[i] = obs
+                    rewards[i] = reward
+                    dones[i] = done
+                    infos.append(info)
+                remote.send(infos)
+            elif command == "reset":
+                seeds, options = data
+                infos = []
+                for j, env in enumerate(envs):
+                    obs, info = env.reset(seed=seeds[j], options=options[j])
+                    observations[start + j] = obs
+                    infos.append(info)
+                remote.send(infos)
+            elif command == "get_attr":
+                name, local = data
+                remote.send([getattr(envs[j], name) for j in local])
+            elif command == "set_attr":
+                name, value, local = data
+                for j in local:
+                    setattr(envs[j], name, value)
+                remote.send([None] * len(local))
+            elif command == "env_method":
+                name, args, kwargs, local = data
+                remote.send([getattr(envs[j], name)(*args, **kwargs) for j in local])
+            elif command == "is_wrapped":
+                wrapper_class, local = data
+                remote.send([_is_wrapped(envs[j], wrapper_class) for j in local])
+            elif command == "close":
+                for env in envs:
+                    env.close()
+                remote.close()
+                break
+            else:
+                raise ValueError(f"unknown command {command!r} for envs {start}..{stop - 1}")
+    except KeyboardInterrupt:
+        pass
+
+
+def _is_wrapped(env, wrapper_class):
+    while env is not None:
+        if isinstance(env, wrapper_class):
+            return True
+        env = getattr(env, "env", None)
+    return False
+
+
+# Vectorized env in the stable-baselines3 VecEnv API. The envs are split into one shard per
+# worker process, and observations, actions, rewards and dones live in shared memory.
+class SharedMemoryVecEnv(VecEnv if VecEnv is not None else object):
+    def __init__(self, env_fns, num_workers=None, start_method=None, observation_space=None, action_space=None):
+        """
+        env_fns are callables returning Gym/Gymnasium envs, e.g. BeerGameEnv. num_workers
+        defaults to one per CPU core (at most one per env). Spaces are read from a throwaway
+        env_fns[0]() unless given. start_method is a multiprocessing start method;
+        "spawn" and "forkserver" need env_fns to be picklable (cloudpickle handles lambdas).
+        """
+        num_envs = len(env_fns)
+        if observation_space is None or action_space is None:
+            probe = env_fns[0]()
+            observation_space = observation_space or probe.observation_space
+            action_space = action_space or probe.action_space
+            probe.close()
+
+        if VecEnv is not None:
+            super().__init__(num_envs, observation_space, action_space)
+        else:
+            self.num_envs = num_envs
+            self.observation_space = observation_space
+            self.action_space = action_space
+            self.reset_infos = [{} for _ in range(num_envs)]
+            self._seeds = [None] * num_envs
+
+        ctx = mp.get_context(start_method)
+        action_dtype = action_space.dtype if action_space.dtype is not None else np.int64
+        self._buffers = (
+            _buffer(ctx, (num_envs,) + tuple(observation_space.shape), observation_space.dtype),
+            _buffer(ctx, (num_envs,) + tuple(action_space.shape), action_dtype),
+            _buffer(ctx, (num_envs,), np.float32),
+            _buffer(ctx, (num_envs,), np.bool_),
+        )
+        self._observations, self._actions, self._rewards, self._dones = (_view(b) for b in self._buffers)
+
+        num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        self.shards = np.array_split(np.arange(num_envs), num_workers)
+        self.remotes, self.processes = [], []
+        for shard in self.shards:
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_shard_worker,
+                args=(worker_remote, remote, _Pickled([env_fns[i] for i in shard]), int(shard[0]), self._buffers),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        # Worker and local position of every env
+        self._locations = [(w, j) for w, shard in enumerate(self.shards) for j in range(len(shard))]
+        self.waiting = False
+        self.closed = False
+
+    def _gather(self, indices, command, *data):
+        # Sends one command per worker that owns any of indices and returns results in indices order
+        indices = self._get_indices(indices)
+        by_worker = {}
+        for i in indices:
+            worker, local = self._locations[i]
+            by_worker.setdefault(worker, []).append(local)
+        for worker, local in by_worker.items():
+            self.remotes[worker].send((command, (*data, local)))
+        replies = {worker: iter(self.remotes[worker].recv()) for worker in by_worker}
+        return [next(replies[self._locations[i][0]]) for i in indices]
+
+    def _get_indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def seed(self, seed=None):
+        # Seeds used by the next reset(), one per env
+        if seed is None:
+            seed = int(np.random.randint(0, 2 ** 31 - 1))
+        self._seeds = [seed + i for i in range(self.num_envs)]
+        return self._seeds
+
+    def reset(self):
+        options = getattr(self, "_options", None) or [{} for _ in range(self.num_envs)]
+        for remote, shard in zip(self.remotes, self.shards):
+            remote.send(("reset", ([self._seeds[i] for i in shard], [options[i] for i in shard])))
+        self.reset_infos = [info for remote in self.remotes for info in remote.recv()]
+        self._seeds = [None] * self.num_envs
+        return self._observations.copy()
+
+    def step_async(self, actions):
+        self._actions[:] = np.asarray(actions).reshape(self._actions.shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = [info for remote in self.remotes for info in remote.recv()]
+        self.waiting = False
+        return self._observations.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        return self._gather(indices, "get_attr", attr_name)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._gather(indices, "set_attr", attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._gather(indices, "env_method", method_name, method_args, method_kwargs)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return self._gather(indices, "is_wrapped", wrapper_class)
+
+    def get_images(self):
+        return [None] * self.num_envs
@@ -0,0 +1,245 @@
+import copy
+
+import numpy as np
+
+
+# Streaming, seedable sources of customer demand or lead times.
+# SupplyChainEnvironment pulls values from them in chunks, so memory does not grow with the horizon.
+class SeriesSource:
+    def __init__(self, seed=None, low=0, high=None, chunk_size=4096):
+        """
+        Values are rounded to integers and clipped to [low, high]; high is also the
+        max_value the environment uses to size its pipeline when the source feeds lead times.
+        """
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.low = low
+        self.high = high
+        self.chunk_size = chunk_size
+        self.reset()
+
+    @property
+    def max_value(self):
+        return self.high
+
+    def reset(self):
+        # Restarts the stream from its seed, so every episode replays the same sequence
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self.position = 0
+        self._chunk = np.zeros(0, dtype=np.int64)
+        self._index = 0
+        self._reset_state()
+
+    def _reset_state(self):
+        pass
+
+    def _generate(self, n):
+        # Next n raw values of the stream; finite streams return fewer at their end
+        raise NotImplementedError
+
+    def next_chunk(self, n):
+        values = np.rint(self._generate(n))
+        if self.low is not None or self.high is not None:
+            values = np.clip(values, self.low, self.high)
+        values = values.astype(np.int64)
+        self.position += len(values)
+        return values
+
+    def next(self):
+        if self._index >= len(self._chunk):
+            self._chunk = self.next_chunk(self.chunk_size)
+            self._index = 0
+        value = self._chunk[self._index]
+        self._index += 1
+        return int(value)
+
+    def _clone(self):
+        return copy.copy(self)
+
+    def close(self):
+        # Releases what the source holds open, e.g. a file handle; reset() reopens it
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def spawn(self, n):
+        """
+        Returns n copies of this source with independent random streams, e.g. one per worker.
+        """
+        children = []
+        for seed_sequence in self.seed_sequence.spawn(n):
+            child = self._clone()
+            child.seed_sequence = seed_sequence
+            child.reset()
+            children.append(child)
+        return children
+
+    def __getitem__(self, index):
+        # source[:n] materializes the first n values without moving this stream
+        if not isinstance(index, slice) or index.start not in (None, 0) or index.step not in (None, 1) or index.stop is None:
+            raise TypeError("sources only support source[:n]")
+        with self._clone() as replay:
+            replay.reset()
+            return replay.next_chunk(index.stop).tolist()
+
+
+class IIDSource(SeriesSource):
+    # Independent draws: "poisson" (mean), "uniform" (low..high) or "normal" (mean, std)
+    def __init__(self, distribution="poisson", mean=10.0, std=None, seed=None, low=0, high=None, chunk_size=4096):
+        if distribution == "uniform" and high is None:
+            raise ValueError("uniform sources need high")
+        self.distribution = distribution
+        self.mean = mean
+        self.std = mean / 3 if std is None else std
+        super().__init__(seed, low, high, chunk_size)
+
+    def _generate(self, n):
+        if self.distribution == "poisson":
+            return self.rng.poisson(self.mean, n)
+        if self.distribution == "uniform":
+            return self.rng.integers(self.low, self.high + 1, n)
+        if self.distribution == "normal":
+            return self.rng.normal(self.mean, self.std, n)
+        raise ValueError(f"unknown distribution: {self.distribution}")
+
+
+class AR1Source(SeriesSource):
+    # x[t] = mean + phi * (x[t-1] - mean) + normal(0, sigma)
+    def __init__(self, mean=10.0, phi=0.7, sigma=3.0, seed=None, low=0, high=None, chunk_size=4096):
+        self.mean = mean
+        self.phi = phi
+        self.sigma = sigma
+        super().__init__(seed, low, high, chunk_size)
+
+    def _reset_state(self):
+        self._last = self.mean
+
+    def _generate(self, n):
+        noise = self.rng.normal(0.0, self.sigma, n)
+        values = np.empty(n)
+        last = self._last
+        for i in range(n):
+            last = self.mean + self.phi * (last - self.mean) + noise[i]
+            values[i] = last
+        self._last = last
+        return values
+
+
+class SeasonalSource(SeriesSource):
+    # base + amplitude * sin(2 * pi * t / period + phase) + normal(0, noise)
+    def __init__(self, base=10.0, amplitude=5.0, period=52, phase=0.0, noise=1.0, seed=None, low=0, high=None,
+                 chunk_size=4096):
+        self.base = base
+        self.amplitude = amplitude
+        self.period = period
+        self.phase = phase
+        self.noise = noise
+        super().__init__(seed, low, high, chunk_size)
+
+    def _generate(self, n):
+        t = np.arange(self.position, self.position + n)
+        season = self.amplitude * np.sin(2 * np.pi * t / self.period + self.phase)
+        return self.base + season + self.rng.normal(0.0, self.noise, n)
+
+
+class MemmapSource(SeriesSource):
+    """
+    Replays a 1-D .npy file through a read-only memory map (or an in-memory array),
+    wrapping around at the end when loop=True. Otherwise next() raises IndexError
+    once every value was played.
+    """
+
+    def __init__(self, path_or_array, loop=True, low=None, high=None, chunk_size=4096):
+        self.path = path_or_array if isinstance(path_or_array, str) else None
+        self._array = None if self.path is not None else np.asarray(path_or_array)
+        self.loop = loop
+        super().__init__(None, low, high, chunk_size)
+
+    @property
+    def array(self):
+        if self._array is None:
+            self._array = np.load(self.path, mmap_mode="r")
+        return self._array
+
+    def __getstate__(self):
+        # Workers reopen the memory map instead of receiving a copy of the file
+        state = self.__dict__.copy()
+        if self.path is not None:
+            state["_array"] = None
+        return state
+
+    def _generate(self, n):
+        array = self.array
+        if not self.loop:
+            if self.position >= len(array):
+                raise IndexError(f"{self.path or 'array'} has only {len(array)} values")
+            n = min(n, len(array) - self.position)
+        indices = (self.position + np.arange(n)) % len(array)
+        return np.asarray(array[indices])
+
+
+class FileReplaySource(SeriesSource):
+    """
+    Replays whitespace- or comma-separated integers from a text file, read lazily
+    one chunk at a time and wrapping around at the end when loop=True. Otherwise
+    next() raises IndexError once every value was played.
+    """
+
+    def __init__(self, path, loop=True, low=None, high=None, chunk_size=4096):
+        self.path = path
+        self.loop = loop
+        self._file = None
+        super().__init__(None, low, high, chunk_size)
+
+    def __getstate__(self):
+        # Workers open their own handle on the file
+        state = self.__dict__.copy()
+        state["_file"] = None
+        state["_pending"] = []
+        return state
+
+    def _clone(self):
+        clone = copy.copy(self)
+        clone._file = None
+        return clone
+
+    def _reset_state(self):
+        # One handle per source, rewound on every reset
+        if self._file is None:
+            self._file = open(self.path)
+        else:
+            self._file.seek(0)
+        self._pending = []
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _generate(self, n):
+        if self._file is None:
+            self._reset_state()
+        values = []
+        rewound = False
+        while len(values) < n:
+            if not self._pending:
+                line = self._file.readline()
+                if not line:
+                    if not self.loop and values:
+                        break
+                    if not self.loop or rewound:
+                        raise IndexError(f"{self.path} ran out of values")
+                    self._file.seek(0)
+                    rewound = True
+                    continue
+                self._pending = [int(float(token)) for token in line.replace(",", " ").split()]
+                if self._pending:
+                    rewound = False
+            take = min(n - len(values), len(self._pending))
+            values.extend(self._pending[:take])
+            self._pending = self._pending[take:]
+        return np.asarray(values)
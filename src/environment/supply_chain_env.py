@@ -1,66 +1,241 @@
+import math
+from bisect import bisect_right
+
+import numpy as np
+
+from src.environment.sources import SeriesSource
+
+# Inventory bucket edges of the paper's state coding: code 1 is below -6, code 9 is 20 and above
+DEFAULT_BUCKET_EDGES = (-6, -3, 0, 3, 6, 10, 15, 20)
+
+# Customer demand and lead times of the paper's main test problem, the default scenario
+DEFAULT_CUSTOMER_DEMAND = (15, 10, 8, 14, 9, 3, 13, 2, 13, 11, 3, 4, 6, 11, 15, 12, 15, 4, 12, 3, 13, 10, 15, 15, 3, 11,
+                           1, 13, 10, 10, 0, 0, 8, 0, 14)
+DEFAULT_LEAD_TIMES = (2, 0, 2, 4, 4, 4, 0, 2, 4, 1, 1, 0, 0, 1, 1, 0, 1, 1, 2, 1, 1, 1, 4, 2, 2, 1, 4, 3, 4, 1, 4, 0, 3, 3, 4)
+
+# Cost per unit and period of inventory on hand and of backlog
+DEFAULT_HOLDING_COST = 1
+DEFAULT_BACKLOG_COST = 2
+
+# History recording modes of SupplyChainEnvironment
+RECORD_MODES = ("none", "last_episode", "ring")
+
+# Maximum number of memoized inventory tuples in SupplyChainEnvironment.code_state
+CODE_CACHE_SIZE = 1 << 16
+
+
+def cost_dtype(*costs):
+    # Costs are integers unless a cost parameter is fractional
+    return np.result_type(*costs, np.int64)
+
+
+def state_index(coded_state, n_codes):
+    # Packs one coded state (codes from 1) like code_states: mixed radix, retailer most significant
+    index = 0
+    for code in coded_state:
+        index = index * n_codes + (code - 1)
+    return index
+
+
+def code_states(states, bucket_edges=DEFAULT_BUCKET_EDGES):
+    """
+    Vectorized state coding: maps an (N, echelons) array of inventories to N packed state
+    indices, the mixed-radix number of the 0-based codes with the retailer most significant.
+    """
+    n_codes = len(bucket_edges) + 1
+    codes = np.searchsorted(np.asarray(bucket_edges), np.asarray(states), side="right")
+    radix = n_codes ** np.arange(codes.shape[-1] - 1, -1, -1)
+    return codes @ radix
+
+
 # We create our Supply Chain Environment of Beer game with 4 levels
 class SupplyChainEnvironment:
-    def __init__(self, customer_demand=None, lead_times=None, time_horizon=35):
+    def __init__(self, customer_demand=None, lead_times=None, time_horizon=35, max_lead_time=None,
+                 bucket_edges=DEFAULT_BUCKET_EDGES, record=None, record_episodes=1,
+                 holding_cost=DEFAULT_HOLDING_COST, backlog_cost=DEFAULT_BACKLOG_COST, metrics=None):
+        """
+        customer_demand and lead_times are lists, or SeriesSource streams that are read in
+        chunks so memory stays constant for any time_horizon.
+        record selects how inventory, order and cost histories are kept:
+        "none" keeps nothing, "last_episode" keeps the current episode and
+        "ring" keeps the last record_episodes episodes. Storage is preallocated once and grows
+        with time_horizon. By default ("none" with a streamed source, "last_episode" otherwise)
+        streamed episodes keep nothing.
+        metrics is an optional StreamingMetrics (num_envs=1) updated at every step.
+        """
         
         if customer_demand is None:
             # Default customer demand from paper's main test problem
-            self.customer_demand = [15, 10, 8, 14, 9, 3, 13, 2, 13, 11, 3, 4, 6, 11, 15, 12, 15, 4, 12, 3, 13, 10, 15, 15, 3, 11, 1, 13, 10,10, 0, 0, 8, 0, 14]                 
+            self.customer_demand = list(DEFAULT_CUSTOMER_DEMAND)
         else:
             self.customer_demand = customer_demand
             
         
         if lead_times is None:
             # Default lead times from paper's main test problem
-            self.lead_times = [2, 0, 2, 4, 4, 4, 0, 2, 4, 1, 1, 0, 0, 1, 1, 0, 1, 1, 2, 1, 1, 1, 4, 2, 2, 1, 4, 3, 4, 1, 4, 0, 3, 3, 4]
+            self.lead_times = list(DEFAULT_LEAD_TIMES)
         else:
             self.lead_times = lead_times
             
         self.time_horizon = time_horizon
+
+        # In-transit stock is kept in a fixed number of slots per echelon, indexed by
+        # arrival period modulo num_slots. Shipments with lead time 0 arrive next period.
+        self._demand_stream = isinstance(self.customer_demand, SeriesSource)
+        self._lead_time_stream = isinstance(self.lead_times, SeriesSource)
+        if max_lead_time is None and self._lead_time_stream:
+            max_lead_time = self.lead_times.max_value
+            if max_lead_time is None:
+                raise ValueError("streamed lead times need max_lead_time or a source with high set")
+        elif max_lead_time is None:
+            max_lead_time = max(self.lead_times[:time_horizon], default=1)
+        self.max_lead_time = max(max_lead_time, 1)
+        self.num_slots = self.max_lead_time + 1
         
         # Initial inventories:
         self.inventory_position = [12, 12, 12, 12]  # [retailer, distributor, manufacturer, supplier]
-        self.pipeline = [[[4, 1], [4, 2]] for _ in range(4)]  # [amount, time_remaining]
+        self.pipeline = self._initial_pipeline()
         
         # Current time step
         self.current_time = 0
         
         # Cost parameters
-        self.holding_cost = 1  # $1 per unit per period
-        self.backlog_cost = 2  # $2 per unit per period
+        self.holding_cost = holding_cost  # $1 per unit per period by default
+        self.backlog_cost = backlog_cost  # $2 per unit per period by default
         
         # Track orders received by each actor at each time step
         self.orders_received = [0, 0, 0, 0]  # [retailer, distributor, manufacturer, supplier]
         
         # Track costs
-        self.period_costs = []
         self.total_cost = 0
 
-        self.inventory_history = [[] for _ in range(4)]
-        self.order_history = [[] for _ in range(4)]
+        # History recording
+        if record is None:
+            record = "none" if self._demand_stream or self._lead_time_stream else "last_episode"
+        if record not in RECORD_MODES:
+            raise ValueError(f"record must be one of {RECORD_MODES}, got {record!r}")
+        self.record = record
+        if record == "none":
+            record_episodes = 0
+        elif record == "last_episode":
+            record_episodes = 1
+        self.record_episodes = record_episodes
+        self._inventory_record = np.zeros((record_episodes, time_horizon, 4), dtype=np.int64)
+        self._order_record = np.zeros((record_episodes, time_horizon, 4), dtype=np.int64)
+        self._cost_record = np.zeros((record_episodes, time_horizon), dtype=cost_dtype(holding_cost, backlog_cost))
+        self._record_lengths = np.zeros(record_episodes, dtype=np.int64)
+        self._record_slot = 0
+        self._recorded_episodes = 1 if record_episodes else 0
+
+        # State coding
+        self.bucket_edges = tuple(bucket_edges)
+        self.n_state_codes = len(self.bucket_edges) + 1
+        self._build_code_lookup()
+
+        # Online KPIs (src/utils/metrics.py)
+        self.metrics = metrics
 
         
+    def _build_code_lookup(self):
+        # With integer edges the code of an inventory only depends on floor(inventory), so the
+        # codes between the first and last edge are precomputed and the ends are clamped
+        if all(float(edge).is_integer() for edge in self.bucket_edges):
+            self._code_offset = int(self.bucket_edges[0]) - 1
+            upper = int(self.bucket_edges[-1])
+            self._code_lookup = tuple(
+                bisect_right(self.bucket_edges, inventory) + 1
+                for inventory in range(self._code_offset, upper + 1)
+            )
+        else:
+            self._code_lookup = None
+        self._code_cache = {}
+
+    @property
+    def inventory_history(self):
+        # (4, t) view of the current episode, one row per echelon
+        return self.get_history()["inventory_history"]
+
+    @property
+    def order_history(self):
+        return self.get_history()["order_history"]
+
+    @property
+    def period_costs(self):
+        return self.get_history()["period_costs"]
+
+    def get_history(self, episodes_ago=0):
+        """
+        Recorded histories of the current episode (episodes_ago=0) or an earlier one still
+        held in the ring, as a log dict with (4, t) inventory/order arrays and (t,) costs.
+        """
+        if self.record == "none":
+            empty = np.zeros((4, 0), dtype=np.int64)
+            return {"inventory_history": empty, "order_history": empty, "period_costs": empty[0]}
+        if episodes_ago >= self._recorded_episodes:
+            raise IndexError(f"only {self._recorded_episodes} episodes are recorded")
+
+        slot = (self._record_slot - episodes_ago) % self.record_episodes
+        length = self.current_time if episodes_ago == 0 else self._record_lengths[slot]
+        return {
+            "inventory_history": self._inventory_record[slot, :length].T,
+            "order_history": self._order_record[slot, :length].T,
+            "period_costs": self._cost_record[slot, :length],
+        }
+
+    def _initial_pipeline(self):
+        # Two packages of 4 units arriving in periods 0 and 1
+        pipeline = [[0] * self.num_slots for _ in range(4)]
+        for slots in pipeline:
+            slots[0] = 4
+            slots[1] = 4
+        return pipeline
+
+    def _arrival_slot(self, lead_time):
+        if lead_time > self.max_lead_time:
+            raise ValueError(f"lead time {lead_time} exceeds max_lead_time={self.max_lead_time}")
+        return (self.current_time + max(lead_time, 1)) % self.num_slots
+
+    def pipeline_view(self):
+        """
+        Returns the in-transit stock in the list form [[amount, time_remaining], ...] per echelon,
+        ordered by arrival. Packages arriving in the same period are merged.
+        """
+        view = []
+        for slots in self.pipeline:
+            packages = []
+            for time_remaining in range(1, self.num_slots + 1):
+                amount = slots[(self.current_time + time_remaining - 1) % self.num_slots]
+                if amount != 0:
+                    packages.append([amount, time_remaining])
+            view.append(packages)
+        return view
+
     def code_state(self, state):
-        coded_state = []
-        for inventory in state:
-            if inventory < -6:
-                coded_state.append(1)
-            elif inventory < -3:
-                coded_state.append(2)
-            elif inventory < 0:
-                coded_state.append(3)
-            elif inventory < 3:
-                coded_state.append(4)
-            elif inventory < 6:
-                coded_state.append(5)
-            elif inventory < 10:
-                coded_state.append(6)
-            elif inventory < 15:
-                coded_state.append(7)
-            elif inventory < 20:
-                coded_state.append(8)
-            else:
-                coded_state.append(9)
-        return tuple(coded_state)
+        # Codes run from 1 (below the first edge) to n_state_codes (at or above the last edge).
+        # Coded states are memoized per inventory tuple; the cache is dropped when it gets large.
+        key = tuple(state)
+        coded_state = self._code_cache.get(key)
+        if coded_state is not None:
+            return coded_state
+
+        lookup = self._code_lookup
+        if lookup is None:
+            coded_state = tuple(bisect_right(self.bucket_edges, inventory) + 1 for inventory in key)
+        else:
+            last = len(lookup) - 1
+            offset = self._code_offset
+            coded_state = tuple(lookup[min(max(math.floor(inventory) - offset, 0), last)] for inventory in key)
+
+        if len(self._code_cache) >= CODE_CACHE_SIZE:
+            self._code_cache.clear()
+        self._code_cache[key] = coded_state
+        return coded_state
+
+    def code_states(self, states):
+        return code_states(states, self.bucket_edges)
+
+    def state_index(self, coded_state):
+        return state_index(coded_state, self.n_state_codes)
     
     def get_state(self):
         return self.inventory_position.copy()
@@ -81,21 +256,26 @@ class SupplyChainEnvironment:
         if self.current_time >= self.time_horizon:
             return self.get_state(), 0, True, {}
 
-        customer_demand = self.customer_demand[self.current_time]
-        lead_time = self.lead_times[self.current_time]
+        if self._demand_stream:
+            customer_demand = self.customer_demand.next()
+        else:
+            customer_demand = self.customer_demand[self.current_time]
+        if self._lead_time_stream:
+            lead_time = self.lead_times.next()
+        else:
+            lead_time = self.lead_times[self.current_time]
+        arrival_slot = self._arrival_slot(lead_time)
 
-        # Process incoming goods
+        # Process incoming goods: read and clear the slot that arrives this period
+        slot = self.current_time % self.num_slots
         for i in range(4):
-            for package in self.pipeline[i]:
-                if package[1] > 0:
-                    package[1] -= 1
-
-            delivered = sum(package[0] for package in self.pipeline[i] if package[1] == 0)
-            self.inventory_position[i] += delivered
-            self.pipeline[i] = [package for package in self.pipeline[i] if package[1] > 0]
+            self.inventory_position[i] += self.pipeline[i][slot]
+            self.pipeline[i][slot] = 0
 
         # Process orders from downstream
         self.orders_received[0] = customer_demand
+        if self.metrics is not None:
+            received = self.orders_received.copy()
 
         for i in range(4):
             order = customer_demand if i == 0 else self.orders_received[i]
@@ -103,7 +283,7 @@ class SupplyChainEnvironment:
             if self.inventory_position[i] >= order:
                 self.inventory_position[i] -= order
                 if i > 0:
-                    self.pipeline[i - 1].append([order, lead_time])
+                    self.pipeline[i - 1][arrival_slot] += order
             else:
                 available = max(0, self.inventory_position[i])
                 backordered = order - available
@@ -111,7 +291,7 @@ class SupplyChainEnvironment:
                 if available > 0:
                     self.inventory_position[i] -= available
                     if i > 0:
-                        self.pipeline[i - 1].append([available, lead_time])
+                        self.pipeline[i - 1][arrival_slot] += available
 
                 self.inventory_position[i] -= backordered
 
@@ -125,31 +305,50 @@ class SupplyChainEnvironment:
                 self.orders_received[i + 1] = order_size
             else:
                 order_size = self.orders_received[i] + actions[i]
-                self.pipeline[i].append([order_size, lead_time])
+                self.pipeline[i][arrival_slot] += order_size
 
         cost = self.calculate_cost()
-        self.period_costs.append(cost)
         self.total_cost += cost
-        self.current_time += 1
 
-        for i in range(4):
-            self.inventory_history[i].append(self.inventory_position[i])
-            self.order_history[i].append(self.orders_received[i])
+        if self.metrics is not None:
+            self.metrics.update(customer_demand, received, self.orders_received[1:] + [order_size], self.inventory_position)
+
+        if self.record_episodes:
+            slot = self._record_slot
+            self._inventory_record[slot, self.current_time] = self.inventory_position
+            self._order_record[slot, self.current_time] = self.orders_received
+            self._cost_record[slot, self.current_time] = cost
+
+        self.current_time += 1
 
         return self.get_state(), -cost, self.current_time >= self.time_horizon, {"period_cost": cost}
 
     
     def reset(self):
+        # Move to the next recording slot if the previous episode was played
+        if self.record_episodes and self.current_time > 0:
+            self._record_lengths[self._record_slot] = self.current_time
+            self._record_slot = (self._record_slot + 1) % self.record_episodes
+            self._recorded_episodes = min(self._recorded_episodes + 1, self.record_episodes)
+
+        # Streams restart from their seed, like replaying a list
+        if self._demand_stream:
+            self.customer_demand.reset()
+        if self._lead_time_stream:
+            self.lead_times.reset()
+
         # Initialize supply chain for reset
         self.inventory_position = [12, 12, 12, 12]  
-        self.pipeline = [[[4, 1], [4, 2]] for _ in range(4)]  
+        self.pipeline = self._initial_pipeline()
         
         # Reset time step
         self.current_time = 0
         
         # Reset tracking variables
         self.orders_received = [0, 0, 0, 0]
-        self.period_costs = []
         self.total_cost = 0
+
+        if self.metrics is not None:
+            self.metrics.start_episode()
         
         return self.get_state()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import hashlib
+
+import numpy as np
+
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.supply_chain_env import SupplyChainEnvironment, cost_dtype
+from src.utils.metrics import KPI_FIELDS, StreamingMetrics
+from src.utils.profiling import instrumentation
+
+
+# Single evaluation engine shared by every policy implementing the Policy protocol
+class EpisodeResult:
+    def __init__(self, total_cost, period_costs=None, inventory_history=None, order_history=None):
+        self.total_cost = total_cost
+        # (T,) and (T, 4) arrays, or None when the episode was run without recording
+        self.period_costs = period_costs
+        self.inventory_history = inventory_history
+        self.order_history = order_history
+
+    def to_log(self):
+        # Log dict in the layout the visualizer expects: one row per echelon
+        return {
+            "inventory_history": self.inventory_history.T,
+            "order_history": self.order_history.T,
+            "period_costs": self.period_costs,
+        }
+
+
+@instrumentation.timed("evaluate.episode")
+def run_episode(policy, env, record=True):
+    """
+    Plays one episode of policy on env. With record=False only the total cost is kept.
+    """
+    state = env.reset()
+    policy.reset()
+    horizon = env.time_horizon
+
+    if record:
+        period_costs = np.zeros(horizon, dtype=cost_dtype(env.holding_cost, env.backlog_cost))
+        inventory_history = np.zeros((horizon, 4), dtype=np.int64)
+        order_history = np.zeros((horizon, 4), dtype=np.int64)
+
+    total_cost = 0
+    done = False
+    t = 0
+    while not done:
+        action = policy.act(state, env)
+        state, reward, done, info = env.step(action)
+        total_cost -= reward
+
+        if record:
+            period_costs[t] = info["period_cost"]
+            inventory_history[t] = env.inventory_position
+            order_history[t] = env.orders_received
+        t += 1
+
+    instrumentation.count("env.steps", t)
+    if not record:
+        return EpisodeResult(total_cost)
+    return EpisodeResult(total_cost, period_costs, inventory_history, order_history)
+
+
+def evaluate_policy(policy, env=None, record=True):
+    # One episode on the policy's own environment (or env), as (total_cost, EpisodeResult)
+    result = run_episode(policy, policy.env if env is None else env, record)
+    return result.total_cost, result
+
+
+def scenario_hash(scenario):
+    """
+    Hex digest of everything that determines an episode's costs for a given policy: the demand
+    and lead times over the horizon, the horizon, the cost parameters and the state coding.
+    scenario is a dict of SupplyChainEnvironment keyword arguments; missing keys take the defaults.
+    """
+    env = SupplyChainEnvironment(**dict(scenario, record="none"))
+    horizon = env.time_horizon
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(env.customer_demand[:horizon], dtype=np.int64).tobytes())
+    digest.update(np.asarray(env.lead_times[:horizon], dtype=np.int64).tobytes())
+    digest.update(repr((horizon, env.holding_cost, env.backlog_cost, env.bucket_edges)).encode())
+    return digest.hexdigest()
+
+
+def _result_dtype(horizon, record, cost_dtype=np.int64, metrics=False):
+    fields = [("scenario", np.int64), ("total_cost", cost_dtype)]
+    if record:
+        fields += [
+            ("period_costs", cost_dtype, (horizon,)),
+            ("inventory_history", np.int64, (horizon, 4)),
+            ("order_history", np.int64, (horizon, 4)),
+        ]
+    if metrics:
+        fields += [(name, np.float64, (4,)) for name in KPI_FIELDS]
+    return np.dtype(fields)
+
+
+@instrumentation.timed("evaluate.scenarios")
+def evaluate_scenarios(policy, scenarios, record=False, env_class=SupplyChainEnvironment, metrics=False):
+    """
+    Evaluates policy on every scenario, a list of environment keyword dicts
+    (customer_demand, lead_times, time_horizon, ...), and returns a structured array with
+    one row per scenario. Policies with supports_batch play all scenarios in one
+    BatchSupplyChainEnvironment when they share a horizon. Recording requires equal horizons.
+    metrics=True adds the per-echelon KPI_FIELDS of StreamingMetrics, computed online.
+    """
+    envs = [env_class(**scenario) for scenario in scenarios]
+    horizons = {env.time_horizon for env in envs}
+    if record and len(horizons) > 1:
+        raise ValueError("recording histories requires all scenarios to share one time horizon")
+
+    horizon = max(horizons)
+    dtype = cost_dtype(*[env.holding_cost for env in envs], *[env.backlog_cost for env in envs])
+    results = np.zeros(len(envs), dtype=_result_dtype(horizon, record, dtype, metrics))
+    results["scenario"] = np.arange(len(envs))
+
+    # One batch needs one horizon and one state coding, since policies act on the coded states
+    bucket_edges = {env.bucket_edges for env in envs}
+    if policy.supports_batch and len(horizons) == 1 and len(bucket_edges) == 1 and env_class is SupplyChainEnvironment:
+        batch = BatchSupplyChainEnvironment.from_envs(
+            envs, record_history=record, metrics=StreamingMetrics(len(envs)) if metrics else None
+        )
+
+        states = batch.reset()
+        policy.reset()
+        done = False
+        while not done:
+            states, _, done, _ = batch.step(policy.act_batch(states, batch))
+        instrumentation.count("env.steps", len(envs) * horizon)
+
+        results["total_cost"] = batch.total_cost
+        if record:
+            results["period_costs"] = batch.period_costs
+            results["inventory_history"] = batch.inventory_history
+            results["order_history"] = batch.order_history
+        if metrics:
+            summary = batch.metrics.summary()
+            for name in KPI_FIELDS:
+                results[name] = summary[name]
+        return results
+
+    for i, env in enumerate(envs):
+        if metrics:
+            if not hasattr(env, "metrics"):
+                raise ValueError(f"{env_class.__name__} does not support streaming metrics")
+            env.metrics = StreamingMetrics()
+        result = run_episode(policy, env, record)
+        results["total_cost"][i] = result.total_cost
+        if record:
+            results["period_costs"][i] = result.period_costs
+            results["inventory_history"][i] = result.inventory_history
+            results["order_history"][i] = result.order_history
+        if metrics:
+            summary = env.metrics.summary()
+            for name in KPI_FIELDS:
+                results[name][i] = summary[name][0]
+    return results
@@ -0,0 +1,190 @@
+import numpy as np
+
+# Echelon order of every (..., 4) array of the environments
+ECHELONS = ("retailer", "distributor", "manufacturer", "supplier")
+
+# Per-echelon KPIs of StreamingMetrics.summary() stored by evaluate_scenarios(metrics=True)
+KPI_FIELDS = (
+    "bullwhip",
+    "order_demand_correlation",
+    "fill_rate",
+    "backlog_periods",
+    "mean_backlog_duration",
+    "max_backlog_duration",
+    "mean_backlog",
+)
+
+
+# Per-echelon accumulators of StreamingMetrics, in the order of its single-game lists
+_ECHELON_FIELDS = (
+    "order_mean",
+    "order_m2",
+    "order_demand_c",
+    "received",
+    "shipped",
+    "backlog_periods",
+    "backlog_units",
+    "backlog_spells",
+    "max_backlog_duration",
+    "_backlog_run",
+)
+
+
+# Online supply chain KPIs: constant memory however many periods are played
+class StreamingMetrics:
+    def __init__(self, num_envs=1, n_echelons=4):
+        """
+        Accumulates one row of statistics per game, updated by SupplyChainEnvironment (one
+        game) or BatchSupplyChainEnvironment (num_envs games) at every step when passed as
+        their metrics argument. Means, variances and the order/demand covariance use
+        Welford's updates, so no history is kept. Statistics run across episodes until
+        reset(); an env reset only closes the current backlog spells. A single game
+        (num_envs=1) is updated with plain Python floats and ints, which is much cheaper than
+        NumPy on 4-element arrays; its arrays are filled in by summary().
+        """
+        self.num_envs = num_envs
+        self.n_echelons = n_echelons
+        self.reset()
+
+    def reset(self):
+        shape = (self.num_envs, self.n_echelons)
+        self.periods = 0
+
+        # Welford accumulators: running means and sums of squared deviations
+        self.demand_mean = np.zeros(self.num_envs)
+        self.demand_m2 = np.zeros(self.num_envs)
+        self.order_mean = np.zeros(shape)
+        self.order_m2 = np.zeros(shape)
+        self.order_demand_c = np.zeros(shape)
+
+        # Service level: units ordered from each echelon and units it shipped at once
+        self.received = np.zeros(shape, dtype=np.int64)
+        self.shipped = np.zeros(shape, dtype=np.int64)
+
+        # Backlog: periods and units with negative inventory, and spells of consecutive periods
+        self.backlog_periods = np.zeros(shape, dtype=np.int64)
+        self.backlog_units = np.zeros(shape, dtype=np.int64)
+        self.backlog_spells = np.zeros(shape, dtype=np.int64)
+        self.max_backlog_duration = np.zeros(shape, dtype=np.int64)
+        self._backlog_run = np.zeros(shape, dtype=np.int64)
+
+        # Plain-Python accumulators of a single game: [demand_mean, demand_m2] and one
+        # list per echelon statistic, in the order of _ECHELON_FIELDS
+        if self.num_envs == 1:
+            self._demand = [0.0, 0.0]
+            self._echelons = [[0.0] * self.n_echelons for _ in range(3)] + [[0] * self.n_echelons for _ in range(7)]
+
+    def start_episode(self):
+        # Called by the environments on reset: backlog spells do not continue into a new episode
+        self._backlog_run[:] = 0
+        if self.num_envs == 1:
+            self._echelons[-1] = [0] * self.n_echelons
+
+    def update(self, demand, received, placed, inventory):
+        """
+        Adds one period. demand is the customer demand (num_envs,), received the orders each
+        echelon had to fill, placed the orders it placed upstream (the supplier's production)
+        and inventory the inventory positions after the period, all (num_envs, n_echelons).
+        """
+        if self.num_envs == 1:
+            self._update_single(demand, received, placed, inventory)
+            return
+        demand = np.reshape(demand, self.num_envs)
+        received = np.reshape(received, self.received.shape)
+        placed = np.reshape(placed, self.order_mean.shape)
+        inventory = np.reshape(inventory, self.received.shape)
+
+        self.periods += 1
+        n = self.periods
+        demand_delta = demand - self.demand_mean
+        self.demand_mean += demand_delta / n
+        demand_deviation = demand - self.demand_mean
+        self.demand_m2 += demand_delta * demand_deviation
+
+        order_delta = placed - self.order_mean
+        self.order_mean += order_delta / n
+        self.order_m2 += order_delta * (placed - self.order_mean)
+        self.order_demand_c += order_delta * demand_deviation[:, None]
+
+        # Shipped from stock on hand: the inventory before shipping was inventory + received
+        self.received += received
+        self.shipped += np.clip(inventory + received, 0, received)
+
+        backlogged = inventory < 0
+        self.backlog_periods += backlogged
+        self.backlog_units += np.maximum(-inventory, 0)
+        self.backlog_spells += backlogged & (self._backlog_run == 0)
+        self._backlog_run = np.where(backlogged, self._backlog_run + 1, 0)
+        np.maximum(self.max_backlog_duration, self._backlog_run, out=self.max_backlog_duration)
+
+    def _update_single(self, demand, received, placed, inventory):
+        # The same updates as update(), element by element in Python
+        if isinstance(demand, np.ndarray):
+            demand = demand.item()
+            received, placed, inventory = (np.ravel(values).tolist() for values in (received, placed, inventory))
+
+        self.periods += 1
+        n = self.periods
+        stats = self._demand
+        demand_delta = demand - stats[0]
+        stats[0] += demand_delta / n
+        demand_deviation = demand - stats[0]
+        stats[1] += demand_delta * demand_deviation
+
+        (order_mean, order_m2, order_demand_c, total_received, shipped, backlog_periods, backlog_units,
+         backlog_spells, max_backlog_duration, backlog_run) = self._echelons
+        for i in range(self.n_echelons):
+            order_delta = placed[i] - order_mean[i]
+            order_mean[i] += order_delta / n
+            order_m2[i] += order_delta * (placed[i] - order_mean[i])
+            order_demand_c[i] += order_delta * demand_deviation
+
+            total_received[i] += received[i]
+            shipped[i] += min(max(inventory[i] + received[i], 0), received[i])
+
+            if inventory[i] < 0:
+                backlog_periods[i] += 1
+                backlog_units[i] -= inventory[i]
+                if backlog_run[i] == 0:
+                    backlog_spells[i] += 1
+                backlog_run[i] += 1
+                if backlog_run[i] > max_backlog_duration[i]:
+                    max_backlog_duration[i] = backlog_run[i]
+            else:
+                backlog_run[i] = 0
+
+    def _sync_single(self):
+        # Copies the plain-Python accumulators of a single game into the arrays
+        self.demand_mean[0], self.demand_m2[0] = self._demand
+        for name, values in zip(_ECHELON_FIELDS, self._echelons):
+            getattr(self, name)[0] = values
+
+    def summary(self):
+        """
+        Returns a dict of (num_envs, n_echelons) arrays, except demand_mean and demand_variance
+        (num_envs,): order means and (population) variances, the bullwhip ratio of order
+        variance to demand variance, the correlation of orders with demand, the fill rate
+        (share of ordered units shipped at once), backlog periods and spells, their mean and
+        longest duration and the mean backlog in units per period. Ratios without data are NaN.
+        """
+        if self.num_envs == 1:
+            self._sync_single()
+        n = max(self.periods, 1)
+        demand_variance = self.demand_m2 / n
+        order_variance = self.order_m2 / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "periods": self.periods,
+                "demand_mean": self.demand_mean.copy(),
+                "demand_variance": demand_variance,
+                "order_mean": self.order_mean.copy(),
+                "order_variance": order_variance,
+                "bullwhip": order_variance / demand_variance[:, None],
+                "order_demand_correlation": self.order_demand_c / np.sqrt(self.order_m2 * self.demand_m2[:, None]),
+                "fill_rate": self.shipped / self.received,
+                "backlog_periods": self.backlog_periods.copy(),
+                "backlog_spells": self.backlog_spells.copy(),
+                "mean_backlog_duration": self.backlog_periods / self.backlog_spells,
+                "max_backlog_duration": self.max_backlog_duration.copy(),
+                "mean_backlog": self.backlog_units / n,
+            }
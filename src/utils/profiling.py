@@ -0,0 +1,170 @@
+import csv
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Shared no-op context returned by phase() while instrumentation is disabled
+_DISABLED_PHASE = nullcontext()
+
+
+class _PhaseTimer:
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        if self.instrumentation.track_allocations:
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stats = self.instrumentation.phases.setdefault(self.name, {"count": 0, "total_seconds": 0.0, "allocated_bytes": 0})
+        stats["count"] += 1
+        stats["total_seconds"] += elapsed
+        if self.instrumentation.track_allocations:
+            stats["allocated_bytes"] += max(0, tracemalloc.get_traced_memory()[0] - self.memory_start)
+        return False
+
+
+# Opt-in per-phase timers and counters for environment stepping, training and evaluation
+class Instrumentation:
+    def __init__(self, enabled=False, track_allocations=False):
+        self.enabled = False
+        self.track_allocations = False
+        self.reset()
+        if enabled:
+            self.enable(track_allocations)
+
+    def enable(self, track_allocations=False):
+        """
+        Starts recording. track_allocations also records the net bytes allocated per phase
+        through tracemalloc, which slows everything down noticeably.
+        """
+        self.enabled = True
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started_at = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+        if self.track_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_allocations = False
+
+    def reset(self):
+        self.phases = {}
+        self.counters = {}
+        self.started_at = time.perf_counter()
+
+    def phase(self, name):
+        # Times the enclosed block under name; a shared no-op context while disabled
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return _PhaseTimer(self, name)
+
+    def timed(self, name):
+        # Decorator form of phase(): times every call of the decorated function under name
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """
+        Current metrics: per-phase call counts and times, counters, and counters per second
+        of wall time since enable() (e.g. env.steps -> env.steps_per_sec).
+        """
+        elapsed = time.perf_counter() - self.started_at
+        phases = {}
+        for name, stats in self.phases.items():
+            phases[name] = dict(stats, mean_seconds=stats["total_seconds"] / stats["count"])
+            if not self.track_allocations:
+                del phases[name]["allocated_bytes"]
+        return {
+            "elapsed_seconds": elapsed,
+            "phases": phases,
+            "counters": dict(self.counters),
+            "rates": {f"{name}_per_sec": value / elapsed for name, value in self.counters.items()} if elapsed > 0 else {},
+        }
+
+    def export(self, path):
+        # Writes the snapshot as JSON, or as flat metric,value rows when path ends in .csv
+        snapshot = self.snapshot()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["metric", "value"])
+                for metric, value in self._flatten(snapshot):
+                    writer.writerow([metric, value])
+        else:
+            with open(path, "w") as f:
+                json.dump(snapshot, f, indent=2)
+        return path
+
+    def _flatten(self, snapshot):
+        yield "elapsed_seconds", snapshot["elapsed_seconds"]
+        for name, stats in snapshot["phases"].items():
+            for key, value in stats.items():
+                yield f"phase.{name}.{key}", value
+        for section in ("counters", "rates"):
+            for name, value in snapshot[section].items():
+                yield f"{section[:-1]}.{name}", value
+
+    def to_prometheus(self):
+        # Prometheus text exposition format
+        snapshot = self.snapshot()
+        lines = [
+            "# TYPE beergame_phase_seconds_total counter",
+            *(f'beergame_phase_seconds_total{{phase="{name}"}} {stats["total_seconds"]}' for name, stats in snapshot["phases"].items()),
+            "# TYPE beergame_phase_calls_total counter",
+            *(f'beergame_phase_calls_total{{phase="{name}"}} {stats["count"]}' for name, stats in snapshot["phases"].items()),
+            "# TYPE beergame_events_total counter",
+            *(f'beergame_events_total{{name="{name}"}} {value}' for name, value in snapshot["counters"].items()),
+            "# TYPE beergame_events_per_second gauge",
+            *(f'beergame_events_per_second{{name="{name[:-len("_per_sec")]}"}} {value}' for name, value in snapshot["rates"].items()),
+        ]
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port=9100, host="127.0.0.1"):
+        """
+        Serves to_prometheus() on http://host:port/metrics from a daemon thread.
+        Returns the server; call shutdown() on it to stop.
+        """
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = instrumentation.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Process-wide instance used by the hooks in the agents, evaluation engine and experiments
+instrumentation = Instrumentation()
@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+from src.environment.supply_chain_env import SupplyChainEnvironment, cost_dtype
+from src.utils.evaluation import _result_dtype, evaluate_scenarios, scenario_hash
+from src.utils.metrics import KPI_FIELDS
+
+# Array fields of an evaluate_scenarios row that are stored next to the total cost
+HISTORY_FIELDS = ("period_costs", "inventory_history", "order_history")
+
+# Host parameters per query, below SQLite's default limit
+QUERY_CHUNK = 500
+
+# New rows a process inserts between recounts of the table, which other processes also fill
+RECOUNT_INTERVAL = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    policy TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    total_cost NUMERIC NOT NULL,
+    fields TEXT NOT NULL,
+    arrays BLOB,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (policy, scenario)
+);
+CREATE INDEX IF NOT EXISTS evaluations_last_used ON evaluations (last_used);
+"""
+
+
+def _pack(arrays):
+    """
+    Stores a dict of arrays as one structured record: returns its layout (a JSON dtype
+    description, empty without arrays) and its zlib-compressed bytes.
+    """
+    if not arrays:
+        return "", None
+    names = sorted(arrays)
+    record = np.zeros((), dtype=[(name, arrays[name].dtype.str, arrays[name].shape) for name in names])
+    for name in names:
+        record[name] = arrays[name]
+    return json.dumps(record.dtype.descr), zlib.compress(record.tobytes())
+
+
+@lru_cache(maxsize=64)
+def _layout(fields):
+    # Entries share a handful of layouts, so each JSON description is parsed once
+    if not fields:
+        return None
+    return np.dtype([(name, dtype, tuple(shape[0]) if shape else ()) for name, dtype, *shape in json.loads(fields)])
+
+
+def _unpack(fields, blob):
+    layout = _layout(fields)
+    if layout is None:
+        return {}
+    record = np.frombuffer(zlib.decompress(blob), dtype=layout)[0]
+    return {name: record[name] for name in layout.names}
+
+
+# Persistent, content-addressed cache of episode evaluations shared by processes and runs
+class EvaluationCache:
+    def __init__(self, path, max_entries=1_000_000, timeout=60.0):
+        """
+        Results live in the SQLite database at path, keyed by the policy's fingerprint() and
+        the scenario_hash of the scenario, so a result is reused whenever the same decisions
+        meet the same demand, lead times and costs. Histories and KPIs are stored compressed
+        when they were requested. The least recently used entries are evicted beyond
+        max_entries; each process keeps a running count of the entries and recounts them
+        after RECOUNT_INTERVAL inserts, so rows added by other processes are noticed. The
+        database runs in WAL mode and writers wait up to timeout seconds for each other, so
+        worker processes can share one file; every process opens its own connection, and the
+        cache can be pickled into workers.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        self._entries = None
+        self._inserted = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_conn"] = None
+        state["_pid"] = None
+        state["_entries"] = None
+        state["_inserted"] = 0
+        return state
+
+    def _connection(self):
+        # One connection per process: SQLite connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+            # Running entry count, so writes do not count the table to decide on eviction
+            (self._entries,) = conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()
+            self._inserted = 0
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        # One IMMEDIATE transaction: concurrent writers queue up, and reads inside it see no other writer
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, statements):
+        # Runs (sql, rows) pairs in one transaction
+        with self._transaction() as conn:
+            for sql, rows in statements:
+                conn.executemany(sql, rows)
+
+    def _fetch(self, policy_key, scenario_keys):
+        conn = self._connection()
+        rows = {}
+        for start in range(0, len(scenario_keys), QUERY_CHUNK):
+            chunk = scenario_keys[start:start + QUERY_CHUNK]
+            query = (
+                "SELECT scenario, total_cost, fields, arrays FROM evaluations "
+                f"WHERE policy = ? AND scenario IN ({', '.join('?' * len(chunk))})"
+            )
+            for scenario, total_cost, fields, arrays in conn.execute(query, [policy_key, *chunk]):
+                layout = _layout(fields)
+                rows[scenario] = (total_cost, fields, set(layout.names if layout is not None else ()), arrays)
+        return rows
+
+    def evaluate_scenarios(self, policy, scenarios, record=False, metrics=False):
+        """
+        Same as evaluation.evaluate_scenarios, but scenarios already in the cache with the
+        requested fields are read back instead of simulated. The misses are evaluated
+        together, so batched policies still play them in one BatchSupplyChainEnvironment.
+        """
+        envs = [SupplyChainEnvironment(**dict(scenario, record="none")) for scenario in scenarios]
+        horizons = {env.time_horizon for env in envs}
+        if record and len(horizons) > 1:
+            raise ValueError("recording histories requires all scenarios to share one time horizon")
+        dtype = cost_dtype(*[env.holding_cost for env in envs], *[env.backlog_cost for env in envs])
+        results = np.zeros(len(scenarios), dtype=_result_dtype(max(horizons, default=0), record, dtype, metrics))
+        results["scenario"] = np.arange(len(scenarios))
+
+        wanted = set(HISTORY_FIELDS if record else ()) | set(KPI_FIELDS if metrics else ())
+        policy_key = policy.fingerprint()
+        scenario_keys = [scenario_hash(scenario) for scenario in scenarios]
+        unique_keys = list(dict.fromkeys(scenario_keys))
+        stored = self._fetch(policy_key, unique_keys)
+
+        found = {}
+        for key in unique_keys:
+            row = stored.get(key)
+            if row is not None and wanted <= row[2]:
+                found[key] = (row[0], _unpack(row[1], row[3]) if wanted else {})
+        missing = [key for key in unique_keys if key not in found]
+        missed = sum(key not in found for key in scenario_keys)
+        self.hits += len(scenario_keys) - missed
+        self.misses += missed
+
+        if missing:
+            first = {key: i for i, key in reversed(list(enumerate(scenario_keys)))}
+            evaluated = evaluate_scenarios(policy, [scenarios[first[key]] for key in missing], record, metrics=metrics)
+            with self._transaction() as conn:
+                # Read again under the write lock: another process may have stored fields meanwhile
+                stored_now = self._fetch(policy_key, missing)
+                now = time.time()
+                rows = []
+                for key, row in zip(missing, evaluated):
+                    # Fields stored earlier for this entry are kept next to the new ones
+                    previous = stored_now.get(key)
+                    arrays = _unpack(previous[1], previous[3]) if previous is not None else {}
+                    arrays.update({name: row[name] for name in wanted})
+                    total_cost = row["total_cost"].item()
+                    found[key] = (total_cost, arrays)
+                    rows.append((policy_key, key, total_cost, *_pack(arrays), now))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO evaluations (policy, scenario, total_cost, fields, arrays, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                added = len(missing) - len(stored_now)
+                self._entries += added
+                self._inserted += added
+                if self._entries > self.max_entries or self._inserted >= RECOUNT_INTERVAL:
+                    self._evict(conn)
+
+        hit_keys = [key for key in unique_keys if key in stored and wanted <= stored[key][2]]
+        if hit_keys:
+            now = time.time()
+            self._write([(
+                "UPDATE evaluations SET last_used = ? WHERE policy = ? AND scenario = ?",
+                [(now, policy_key, key) for key in hit_keys],
+            )])
+
+        for i, key in enumerate(scenario_keys):
+            total_cost, arrays = found[key]
+            results["total_cost"][i] = total_cost
+            for name in wanted:
+                results[name][i] = arrays[name]
+        return results
+
+    def evaluate(self, policy, scenario, record=False, metrics=False):
+        # One scenario, as a row of the evaluate_scenarios array
+        return self.evaluate_scenarios(policy, [scenario], record, metrics)[0]
+
+    def _evict(self, conn):
+        # Inside a write transaction: recounts the table, since other processes insert too
+        (entries,) = conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()
+        excess = entries - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM evaluations WHERE rowid IN "
+                "(SELECT rowid FROM evaluations ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._entries = entries - max(excess, 0)
+        self._inserted = 0
+
+    def stats(self):
+        (entries, stored_bytes) = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(arrays)), 0) FROM evaluations"
+        ).fetchone()
+        return {"entries": entries, "array_bytes": stored_bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        self._write([("DELETE FROM evaluations", [()])])
+        self._entries = 0
+        self._inserted = 0
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._pid = None
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import multiprocessing as mp
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.evaluation import evaluate_scenarios, scenario_hash
+
+# Scenario keys a request may set; everything else uses the SupplyChainEnvironment defaults
+SCENARIO_KEYS = ("customer_demand", "lead_times", "time_horizon", "holding_cost", "backlog_cost")
+
+# Policies loaded into each worker process by _init_worker
+_WORKER_POLICIES = {}
+
+
+def _init_worker(policies):
+    _WORKER_POLICIES.update(policies)
+
+
+def _ping():
+    return len(_WORKER_POLICIES)
+
+
+def _validate_scenario(scenario):
+    # Rejects a scenario before it joins a batch, where it would fail every request of the batch
+    try:
+        env = SupplyChainEnvironment(**dict(scenario, record="none"))
+    except (TypeError, IndexError) as error:
+        raise ValueError(f"invalid scenario: {error}") from error
+    for name in ("customer_demand", "lead_times"):
+        values = getattr(env, name)
+        if len(values) < env.time_horizon:
+            raise ValueError(f"{name} has {len(values)} values, time_horizon is {env.time_horizon}")
+    return env
+
+
+def _evaluate_batch(policy, scenarios, record):
+    """
+    Runs in the worker pool: evaluates one policy (a name of a preloaded policy, or the policy
+    itself when evaluating in-process) on a batch of scenarios sharing one horizon.
+    """
+    if isinstance(policy, str):
+        policy = _WORKER_POLICIES[policy]
+    results = evaluate_scenarios(policy, scenarios, record=record)
+    return [
+        {
+            "total_cost": row["total_cost"].item(),
+            "period_costs": row["period_costs"].tolist() if record else None,
+        }
+        for row in results
+    ]
+
+
+class SimulationService:
+    """
+    Keeps policies warm and answers "cost of policy X under this scenario" queries.
+    Concurrent requests for the same policy and horizon are collected for batch_window
+    seconds and evaluated together with evaluate_scenarios in a process pool (workers=0
+    evaluates in a thread of this process). Results are kept in an LRU keyed by the policy's
+    fingerprint and the scenario hash, so repeated queries skip the simulation.
+    """
+
+    def __init__(self, policies, workers=None, cache_size=100_000, batch_window=0.005, max_batch=4096):
+        self.policies = dict(policies)
+        self.workers = workers
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        self.versions = {name: policy.fingerprint() for name, policy in self.policies.items()}
+        self.cache = OrderedDict()
+        self.stats = {"requests": 0, "cache_hits": 0, "simulated": 0, "batches": 0}
+        self._pending = {}
+        self._executor = None
+
+    def start(self):
+        # Workers receive every policy once, at startup, instead of with every batch.
+        # They are not forked from the server: forked workers would inherit its open client
+        # sockets and keep connections from closing.
+        if self.workers != 0 and self._executor is None:
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=mp.get_context(method), initializer=_init_worker, initargs=(self.policies,)
+            )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def register_policy(self, name, policy):
+        """
+        Adds or replaces a policy. Its new fingerprint keys new cache entries, and the worker
+        pool is restarted so the workers load it.
+        """
+        self.policies[name] = policy
+        self.versions[name] = policy.fingerprint()
+        if self._executor is not None:
+            self.close()
+            self.start()
+
+    async def evaluate(self, policy_name, scenario, record=False):
+        """
+        Returns {"policy", "version", "total_cost", "period_costs", "cached"} for one scenario,
+        a dict of SupplyChainEnvironment keyword arguments.
+        """
+        if policy_name not in self.policies:
+            raise KeyError(f"unknown policy {policy_name!r}")
+        unknown = set(scenario) - set(SCENARIO_KEYS)
+        if unknown:
+            raise ValueError(f"unknown scenario keys: {', '.join(sorted(unknown))}")
+        scenario = dict(scenario)
+        if "time_horizon" not in scenario and "customer_demand" in scenario:
+            scenario["time_horizon"] = len(scenario["customer_demand"])
+        env = _validate_scenario(scenario)
+
+        self.stats["requests"] += 1
+        version = self.versions[policy_name]
+        key = (version, scenario_hash(scenario))
+        cached = self.cache.get(key)
+        if cached is not None and (cached["period_costs"] is not None or not record):
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return dict(cached, policy=policy_name, version=version, cached=True)
+
+        result = await self._enqueue(policy_name, scenario, key, env.time_horizon, record)
+        return dict(result, policy=policy_name, version=version, cached=False)
+
+    def _enqueue(self, policy_name, scenario, key, time_horizon, record):
+        # Requests that can share one batched evaluation wait in the same group
+        loop = asyncio.get_running_loop()
+        group = (policy_name, key[0], time_horizon, record)
+        pending = self._pending.get(group)
+        if pending is None:
+            pending = self._pending[group] = {}
+            loop.call_later(self.batch_window, self._flush, group)
+
+        waiters = pending.get(key)
+        if waiters is None:
+            waiters = pending[key] = (scenario, [])
+        future = loop.create_future()
+        waiters[1].append(future)
+
+        if len(pending) >= self.max_batch:
+            self._flush(group)
+        return future
+
+    def _flush(self, group):
+        pending = self._pending.pop(group, None)
+        if pending:
+            asyncio.get_running_loop().create_task(self._run_batch(group, pending))
+
+    async def _run_batch(self, group, pending):
+        policy_name, version, _, record = group
+        keys = list(pending)
+        scenarios = [pending[key][0] for key in keys]
+        loop = asyncio.get_running_loop()
+        try:
+            if self._executor is None:
+                results = await loop.run_in_executor(None, _evaluate_batch, self.policies[policy_name], scenarios, record)
+            else:
+                results = await loop.run_in_executor(self._executor, _evaluate_batch, policy_name, scenarios, record)
+        except Exception as error:
+            if len(keys) > 1:
+                # Retried one scenario at a time, so the error only reaches the requests it belongs to
+                for key in keys:
+                    await self._run_batch(group, {key: pending[key]})
+                return
+            for key in keys:
+                for future in pending[key][1]:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["simulated"] += len(keys)
+        for key, result in zip(keys, results):
+            # Results computed for a policy version that was replaced meanwhile are not cached
+            if self.versions.get(policy_name) == version:
+                self.cache[key] = result
+                self.cache.move_to_end(key)
+            for future in pending[key][1]:
+                if not future.done():
+                    future.set_result(result)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    # Minimal HTTP/1.1 front end: GET /policies, GET /stats, POST /evaluate with a JSON body
+    # {"policy": ..., "record": false, "customer_demand": [...], "lead_times": [...], ...}
+    async def handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            try:
+                status, payload = await self._route(method, path, body)
+            except (ValueError, KeyError) as error:
+                status, payload = 400, {"error": str(error)}
+            except Exception as error:
+                status, payload = 500, {"error": repr(error)}
+
+            data = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/policies":
+            return 200, self.versions
+        if method == "GET" and path == "/stats":
+            return 200, dict(self.stats, cache_entries=len(self.cache))
+        if method == "POST" and path == "/evaluate":
+            request = json.loads(body or b"{}")
+            start = time.perf_counter()
+            result = await self.evaluate(
+                request.pop("policy"), {key: request[key] for key in SCENARIO_KEYS if key in request},
+                record=bool(request.get("record", False)),
+            )
+            result["milliseconds"] = (time.perf_counter() - start) * 1000
+            return 200, result
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_socket=None):
+        # Serves until cancelled, on a TCP port or a Unix socket path
+        self.start()
+        try:
+            if self._executor is not None:
+                # Starts the workers before the first query has to wait for them
+                await asyncio.get_running_loop().run_in_executor(self._executor, _ping)
+            if unix_socket is not None:
+                server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+            else:
+                server = await asyncio.start_server(self.handle_connection, host, port)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
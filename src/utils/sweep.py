@@ -0,0 +1,191 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+
+from src.utils.evaluation import evaluate_scenarios
+from src.utils.metrics import ECHELONS, KPI_FIELDS
+
+# Grid used when run_sweep is called without one
+DEFAULT_GRID = {
+    "demand": ["poisson", "uniform", "normal"],
+    "demand_mean": [5, 10, 15],
+    "lead_time_range": [(0, 2), (0, 4), (2, 6)],
+    "holding_cost": [1],
+    "backlog_cost": [2, 5],
+    "time_horizon": [35, 100],
+}
+
+# Shard files are named <policy>-<5-digit index>.<format>
+SHARD_PATTERN = "[0-9]" * 5
+
+# Per-episode columns written to every shard
+PARAM_COLUMNS = ("demand", "demand_mean", "lead_time_min", "lead_time_max", "holding_cost", "backlog_cost", "time_horizon")
+
+
+def expand_grid(grid, replicates=1):
+    """
+    Expands a dict of parameter lists into one dict per combination and replicate.
+    Scenario ids follow the order of the expansion with replicates outermost, so the same
+    grid always gives the same ids and adding replicates only appends new ones.
+    """
+    keys = list(grid)
+    combinations = [dict(zip(keys, values)) for values in product(*(grid[key] for key in keys))]
+    return [dict(params, replicate=replicate) for replicate in range(replicates) for params in combinations]
+
+
+def generate_scenario(params, seed):
+    # Environment keyword dict for one grid point, with its own random stream
+    rng = np.random.default_rng(seed)
+    horizon = params["time_horizon"]
+    mean = params["demand_mean"]
+
+    if params["demand"] == "poisson":
+        demand = rng.poisson(mean, horizon)
+    elif params["demand"] == "uniform":
+        demand = rng.integers(0, 2 * mean + 1, horizon)
+    elif params["demand"] == "normal":
+        demand = np.maximum(np.rint(rng.normal(mean, mean / 3, horizon)), 0).astype(np.int64)
+    else:
+        raise ValueError(f"unknown demand distribution: {params['demand']}")
+
+    low, high = params["lead_time_range"]
+    return {
+        "customer_demand": demand.tolist(),
+        "lead_times": rng.integers(low, high + 1, horizon).tolist(),
+        "time_horizon": horizon,
+        "holding_cost": params["holding_cost"],
+        "backlog_cost": params["backlog_cost"],
+    }
+
+
+def _run_shard(policy, scenario_ids, scenarios, seed, metrics=False, cache=None):
+    # Runs in a worker process: evaluates one policy on a batch of generated scenarios
+    env_kwargs = [generate_scenario(params, (seed, scenario_id)) for scenario_id, params in zip(scenario_ids, scenarios)]
+    if cache is not None:
+        results = cache.evaluate_scenarios(policy, env_kwargs, record=False, metrics=metrics)
+    else:
+        results = evaluate_scenarios(policy, env_kwargs, record=False, metrics=metrics)
+
+    columns = {
+        "scenario_id": np.asarray(scenario_ids, dtype=np.int64),
+        "total_cost": results["total_cost"],
+    }
+    if metrics:
+        # One column per KPI and echelon, e.g. bullwhip_retailer
+        for name in KPI_FIELDS:
+            for i, echelon in enumerate(ECHELONS):
+                columns[f"{name}_{echelon}"] = results[name][:, i]
+    for column in PARAM_COLUMNS:
+        if column == "lead_time_min":
+            values = [params["lead_time_range"][0] for params in scenarios]
+        elif column == "lead_time_max":
+            values = [params["lead_time_range"][1] for params in scenarios]
+        else:
+            values = [params[column] for params in scenarios]
+        columns[column] = np.asarray(values)
+    return columns
+
+
+def _write_shard(path, columns, file_format):
+    # Written under a temporary name and renamed, so a shard on disk is always complete
+    tmp_path = path + ".tmp"
+    if file_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table(columns), tmp_path)
+    else:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def _read_shard(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _shard_paths(output_dir, policy_name):
+    pattern = os.path.join(glob.escape(output_dir), f"{glob.escape(policy_name)}-{SHARD_PATTERN}")
+    return sorted(glob.glob(pattern + ".npz") + glob.glob(pattern + ".parquet"))
+
+
+def load_results(output_dir, policy_name=None):
+    """
+    Reads every shard of output_dir back into one dict of columns per policy.
+    """
+    pattern = os.path.join(glob.escape(output_dir), f"*-{SHARD_PATTERN}")
+    policy_names = sorted({os.path.basename(path).rsplit("-", 1)[0]
+                           for path in glob.glob(pattern + ".npz") + glob.glob(pattern + ".parquet")})
+    if policy_name is not None:
+        policy_names = [policy_name]
+
+    results = {}
+    for name in policy_names:
+        shards = [_read_shard(path) for path in _shard_paths(output_dir, name)]
+        if shards:
+            results[name] = {column: np.concatenate([shard[column] for shard in shards]) for column in shards[0]}
+    return results
+
+
+def run_sweep(policies, output_dir, grid=None, replicates=10, workers=None, shard_size=1000,
+              seed=0, file_format="npz", metrics=False, cache=None, verbose=True):
+    """
+    Evaluates every policy (a dict of name -> Policy instance) on every scenario of the
+    expanded grid across a process pool, and streams per-episode results into columnar
+    shards in output_dir (.npz, or .parquet when pyarrow is installed).
+    Scenario/policy pairs already present in output_dir are skipped, so an interrupted
+    sweep resumes where it stopped. metrics=True adds per-echelon KPI columns (bullwhip,
+    fill rate, backlog durations, ...) computed online, without keeping any histories;
+    a resumed sweep must use the same setting. cache is an optional EvaluationCache:
+    episodes already evaluated for the same policy and scenario, in this sweep or any
+    earlier run, are read from it instead of simulated.
+    """
+    grid = DEFAULT_GRID if grid is None else grid
+    scenarios = expand_grid(grid, replicates)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for name, policy in policies.items():
+            existing = _shard_paths(output_dir, name)
+            done = set()
+            for path in existing:
+                done.update(_read_shard(path)["scenario_id"].tolist())
+
+            # Shards are cut within one horizon so batched policies can play them together
+            pending = [i for i in range(len(scenarios)) if i not in done]
+            pending.sort(key=lambda i: scenarios[i]["time_horizon"])
+            if verbose:
+                print(f"[Sweep] {name}: {len(done)} scenarios done, {len(pending)} pending")
+
+            shard_index = 1 + max((int(os.path.basename(path).rsplit("-", 1)[1].split(".")[0]) for path in existing), default=-1)
+            start = 0
+            while start < len(pending):
+                horizon = scenarios[pending[start]]["time_horizon"]
+                end = start
+                while end < len(pending) and end - start < shard_size and scenarios[pending[end]]["time_horizon"] == horizon:
+                    end += 1
+                ids = pending[start:end]
+                path = os.path.join(output_dir, f"{name}-{shard_index:05d}.{file_format}")
+                future = executor.submit(_run_shard, policy, ids, [scenarios[i] for i in ids], seed, metrics, cache)
+                futures[future] = path
+                shard_index += 1
+                start = end
+
+        # Shards are written as soon as they finish
+        for future in as_completed(futures):
+            path = futures[future]
+            _write_shard(path, future.result(), file_format)
+            if verbose:
+                print(f"[Sweep] wrote {path}")
+
+    return load_results(output_dir)
@@ -1,17 +1,36 @@
 import plotly.graph_objs as go
-import plotly.express as px
+from plotly.colors import qualitative
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+import math
 import os
 
-def plot_inventory(env_log, strategy_name):
-    time_steps = list(range(len(env_log["inventory_history"][0])))
+from src.utils.profiling import instrumentation
+
+
+def _scatter_class(webgl):
+    # Scattergl renders long horizons and many traces with WebGL instead of SVG
+    return go.Scattergl if webgl else go.Scatter
+
+
+def _downsample(values, max_points):
+    # Keeps every k-th point so at most max_points are drawn
+    if max_points is None or len(values) <= max_points:
+        return list(range(len(values))), values
+    stride = math.ceil(len(values) / max_points)
+    return list(range(0, len(values), stride)), values[::stride]
+
+
+def plot_inventory(env_log, strategy_name, save=True, webgl=False, max_points=None):
     labels = ['Retailer', 'Distributor', 'Manufacturer', 'Supplier']
-    colors = px.colors.qualitative.Pastel  # Macaron color palette
+    colors = qualitative.Pastel  # Macaron color palette
 
     fig = go.Figure()
+    scatter = _scatter_class(webgl)
     for i in range(4):
-        fig.add_trace(go.Scatter(
+        time_steps, values = _downsample(env_log["inventory_history"][i], max_points)
+        fig.add_trace(scatter(
             x=time_steps,
-            y=env_log["inventory_history"][i],
+            y=values,
             mode='lines',
             name=labels[i],
             line=dict(width=3, color=colors[i % len(colors)])
@@ -26,19 +45,21 @@ def plot_inventory(env_log, strategy_name):
         legend=dict(title="Supply Chain Level"),
     )
 
-    fig.write_html(f"results/{strategy_name.lower()}_inventory.html")
+    if save:
+        fig.write_html(f"results/{strategy_name.lower()}_inventory.html")
     return fig
 
-def plot_orders(env_log, strategy_name):
-    time_steps = list(range(len(env_log["order_history"][0])))
+def plot_orders(env_log, strategy_name, save=True, webgl=False, max_points=None):
     labels = ['Retailer', 'Distributor', 'Manufacturer', 'Supplier']
-    colors = px.colors.qualitative.Pastel
+    colors = qualitative.Pastel
 
     fig = go.Figure()
+    scatter = _scatter_class(webgl)
     for i in range(4):
-        fig.add_trace(go.Scatter(
+        time_steps, values = _downsample(env_log["order_history"][i], max_points)
+        fig.add_trace(scatter(
             x=time_steps,
-            y=env_log["order_history"][i],
+            y=values,
             mode='lines',
             name=labels[i],
             line=dict(width=3, color=colors[i % len(colors)])
@@ -53,19 +74,29 @@ def plot_orders(env_log, strategy_name):
         legend=dict(title="Supply Chain Level"),
     )
 
-    fig.write_html(f"results/{strategy_name.lower()}_orders.html")
+    if save:
+        fig.write_html(f"results/{strategy_name.lower()}_orders.html")
     return fig
 
-def plot_period_costs(env_log, strategy_name):
-    time_steps = list(range(len(env_log["period_costs"])))
-    colors = px.colors.qualitative.Pastel
+def plot_period_costs(env_log, strategy_name, save=True, webgl=False, max_points=None):
+    colors = qualitative.Pastel
+    time_steps, values = _downsample(env_log["period_costs"], max_points)
 
     fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=time_steps,
-        y=env_log["period_costs"],
-        marker_color=colors[2]
-    ))
+    if webgl:
+        # Bars have no WebGL trace, so the costs are drawn as a step line
+        fig.add_trace(go.Scattergl(
+            x=time_steps,
+            y=values,
+            mode='lines',
+            line=dict(width=2, color=colors[2], shape='hv')
+        ))
+    else:
+        fig.add_trace(go.Bar(
+            x=time_steps,
+            y=values,
+            marker_color=colors[2]
+        ))
 
     fig.update_layout(
         title=f"\U0001F4B0 Period Costs Over Time — {strategy_name}",
@@ -75,13 +106,14 @@ def plot_period_costs(env_log, strategy_name):
         font=dict(size=14),
     )
 
-    fig.write_html(f"results/{strategy_name.lower()}_costs.html")
+    if save:
+        fig.write_html(f"results/{strategy_name.lower()}_costs.html")
     return fig
 
-def plot_total_costs(strategy_costs_dict):
+def plot_total_costs(strategy_costs_dict, save=True):
     names = list(strategy_costs_dict.keys())
     costs = list(strategy_costs_dict.values())
-    colors = px.colors.qualitative.Pastel
+    colors = qualitative.Pastel
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -98,19 +130,20 @@ def plot_total_costs(strategy_costs_dict):
         font=dict(size=14),
     )
 
-    fig.write_html("results/total_costs_comparison.html")
+    if save:
+        fig.write_html("results/total_costs_comparison.html")
     return fig
 
-def plot_cumulative_costs_over_time(strategies_results_dict):
+def plot_cumulative_costs_over_time(strategies_results_dict, save=True, webgl=False, max_points=None):
     """
     Plots a line chart of accumulated cost over time for each strategy.
     """
-    colors = px.colors.qualitative.Pastel
+    colors = qualitative.Pastel
     fig = go.Figure()
+    scatter = _scatter_class(webgl)
 
     for i, (name, env_log) in enumerate(strategies_results_dict.items()):
         costs = env_log["period_costs"]
-        print(f"[DEBUG] {name} → period_costs length: {len(costs)}") 
         accumulated_cost = []
         running_total = 0
         for cost in costs:
@@ -122,10 +155,11 @@ def plot_cumulative_costs_over_time(strategies_results_dict):
                 continue
 
         if accumulated_cost:
-            fig.add_trace(go.Scatter(
-                x=list(range(len(accumulated_cost))),
-                y=accumulated_cost,
-                mode='lines+markers',
+            time_steps, values = _downsample(accumulated_cost, max_points)
+            fig.add_trace(scatter(
+                x=time_steps,
+                y=values,
+                mode='lines' if webgl else 'lines+markers',
                 name=f"{name} (Total: {int(accumulated_cost[-1])})",
                 line=dict(width=3, color=colors[i % len(colors)])
             ))
@@ -138,5 +172,68 @@ def plot_cumulative_costs_over_time(strategies_results_dict):
         font=dict(size=14)
     )
 
-    fig.write_html("results/cumulative_costs_over_time.html")
+    if save:
+        fig.write_html("results/cumulative_costs_over_time.html")
     return fig
+
+
+class ReportBuilder:
+    """
+    Collects figures and writes them into a single HTML report that includes plotly.js once.
+    include_plotlyjs is True (inline), "directory" (a shared plotly-<version>.min.js next to
+    the report) or "cdn". webgl and max_points are passed on to the line charts for long horizons.
+    """
+
+    def __init__(self, title="Beer Game Simulation Report", include_plotlyjs="directory", webgl=False, max_points=None):
+        self.title = title
+        self.include_plotlyjs = include_plotlyjs
+        self.webgl = webgl
+        self.max_points = max_points
+        self.figures = []
+
+    def add(self, fig):
+        self.figures.append(fig)
+        return fig
+
+    def add_strategy(self, env_log, strategy_name):
+        # Inventory, orders and period costs of one strategy
+        with instrumentation.phase("report.plot"):
+            self.add(plot_inventory(env_log, strategy_name, save=False, webgl=self.webgl, max_points=self.max_points))
+            self.add(plot_orders(env_log, strategy_name, save=False, webgl=self.webgl, max_points=self.max_points))
+            self.add(plot_period_costs(env_log, strategy_name, save=False, webgl=self.webgl, max_points=self.max_points))
+
+    def add_comparison(self, strategy_costs_dict, strategies_results_dict):
+        with instrumentation.phase("report.plot"):
+            self.add(plot_total_costs(strategy_costs_dict, save=False))
+            self.add(plot_cumulative_costs_over_time(
+                strategies_results_dict, save=False, webgl=self.webgl, max_points=self.max_points
+            ))
+
+    @instrumentation.timed("report.write")
+    def write(self, path="results/report.html"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The plotly.js release the installed plotly.py writes its figures for
+        version = get_plotlyjs_version()
+        if self.include_plotlyjs == "directory":
+            # One shared copy of plotly.js per version for every report written to this directory
+            name = f"plotly-{version}.min.js"
+            bundle = os.path.join(directory, name)
+            if not os.path.exists(bundle):
+                with open(bundle, "w", encoding="utf-8") as f:
+                    f.write(get_plotlyjs())
+            head = f'<script src="{name}" charset="utf-8"></script>'
+        elif self.include_plotlyjs == "cdn":
+            head = f'<script src="https://cdn.plot.ly/plotly-{version}.min.js" charset="utf-8"></script>'
+        else:
+            head = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+        body = "\n".join(fig.to_html(full_html=False, include_plotlyjs=False) for fig in self.figures)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\" />\n"
+                f"<title>{self.title}</title>\n{head}\n</head>\n<body>\n{body}\n</body>\n</html>\n"
+            )
+        return path
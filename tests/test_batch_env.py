@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2,
+    "time_horizon": 35,
+}
+
+
+def test_batch_step_matches_single_env_on_random_actions():
+    # Negative adjustments make some orders negative, which must ship like in the single env
+    scenarios = [generate_scenario(SCENARIO_PARAMS, seed) for seed in range(64)]
+    batch = BatchSupplyChainEnvironment(
+        len(scenarios),
+        customer_demand=[scenario["customer_demand"] for scenario in scenarios],
+        lead_times=[scenario["lead_times"] for scenario in scenarios],
+        holding_cost=np.array([1, 1.5] * 32),
+        backlog_cost=2,
+        record_history=True,
+    )
+    envs = [SupplyChainEnvironment(**dict(scenario, holding_cost=[1, 1.5][i % 2])) for i, scenario in enumerate(scenarios)]
+    states = batch.reset()
+    assert states.tolist() == [env.reset() for env in envs]
+
+    rng = np.random.default_rng(0)
+    done = False
+    while not done:
+        actions = rng.integers(-3, 5, (len(envs), 4))
+        states, rewards, done, info = batch.step(actions)
+        for i, env in enumerate(envs):
+            state, reward, _, _ = env.step(actions[i].tolist())
+            assert states[i].tolist() == state
+            assert rewards[i] == reward
+    np.testing.assert_array_equal(batch.total_cost, [env.total_cost for env in envs])
+    np.testing.assert_array_equal(batch.period_costs, [env.period_costs for env in envs])
+
+
+def test_max_lead_time_shorter_than_lead_times_is_rejected():
+    # SupplyChainEnvironment raises too, when it reaches the long lead time
+    with pytest.raises(ValueError):
+        BatchSupplyChainEnvironment(2, lead_times=[1, 4, 2], time_horizon=3, max_lead_time=3)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.agents.rlom import RLOrderingMechanism
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.evaluation import evaluate_scenarios, run_episode
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1.5,
+    "backlog_cost": 2,
+    "time_horizon": 40,
+}
+
+
+def trained_rlom(bucket_edges):
+    np.random.seed(0)
+    agent = RLOrderingMechanism(SupplyChainEnvironment(bucket_edges=bucket_edges), dense=True)
+    agent.train(episodes=50, verbose=False)
+    return agent
+
+
+def test_batched_evaluation_uses_scenario_bucket_edges():
+    # Fewer codes than the default coding: states packed with the default edges would not fit the table
+    bucket_edges = (-5, 0, 5, 10)
+    agent = trained_rlom(bucket_edges)
+    scenarios = [dict(generate_scenario(SCENARIO_PARAMS, seed), bucket_edges=bucket_edges) for seed in range(8)]
+
+    results = evaluate_scenarios(agent, scenarios, record=True)
+
+    for row, scenario in zip(results, scenarios):
+        expected = run_episode(agent, SupplyChainEnvironment(**scenario))
+        assert row["total_cost"] == expected.total_cost
+        np.testing.assert_array_equal(row["period_costs"], expected.period_costs)
+
+
+def test_batched_evaluation_with_shifted_bucket_edges():
+    # Same number of codes as the default, different cut points
+    bucket_edges = (-8, -4, -1, 2, 5, 9, 14, 25)
+    agent = trained_rlom(bucket_edges)
+    scenarios = [dict(generate_scenario(SCENARIO_PARAMS, seed), bucket_edges=bucket_edges) for seed in range(8)]
+
+    results = evaluate_scenarios(agent, scenarios)
+
+    expected = [run_episode(agent, SupplyChainEnvironment(**scenario), record=False).total_cost for scenario in scenarios]
+    np.testing.assert_array_equal(results["total_cost"], expected)
+
+
+def test_rlom_acts_before_reset():
+    agent = RLOrderingMechanism(SupplyChainEnvironment())
+    env = SupplyChainEnvironment()
+    state = env.reset()
+    assert agent.act(state, env) == [0, 0, 0, 0]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.environment import fast_core
+from src.environment.fast_core import simulate_action_table
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2,
+    "time_horizon": 60,
+}
+
+
+def play_env(table, scenario):
+    env = SupplyChainEnvironment(**scenario)
+    state = env.reset()
+    done = False
+    while not done:
+        state, _, done, _ = env.step(table[env.state_index(env.code_state(state))].tolist())
+    return env.total_cost, env.period_costs
+
+
+@pytest.fixture(params=["numba", "python"])
+def backend(request, monkeypatch):
+    # Without Numba installed the kernel is plain Python, so it is still checked
+    if request.param == "numba" and not fast_core.NUMBA_AVAILABLE:
+        monkeypatch.setattr(fast_core, "NUMBA_AVAILABLE", True)
+    return request.param
+
+
+@pytest.mark.parametrize("holding_cost, backlog_cost", [(1, 2), (0.75, 2.25), (0.7, 2.3)])
+def test_fast_core_matches_env(backend, holding_cost, backlog_cost):
+    table = np.random.default_rng(0).integers(0, 4, (SupplyChainEnvironment().n_state_codes ** 4, 4))
+    scenarios = [
+        dict(generate_scenario(SCENARIO_PARAMS, seed), holding_cost=holding_cost, backlog_cost=backlog_cost)
+        for seed in range(8)
+    ]
+
+    total_cost, period_costs = simulate_action_table(
+        table,
+        [scenario["customer_demand"] for scenario in scenarios],
+        [scenario["lead_times"] for scenario in scenarios],
+        holding_cost=holding_cost,
+        backlog_cost=backlog_cost,
+        backend=backend,
+    )
+
+    for i, scenario in enumerate(scenarios):
+        expected_total, expected_periods = play_env(table, scenario)
+        np.testing.assert_array_equal(period_costs[i], expected_periods)
+        assert total_cost[i] == expected_total
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.environment.batch_env import BatchSupplyChainEnvironment
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.metrics import StreamingMetrics
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2,
+    "time_horizon": 100,
+}
+
+
+def test_single_game_metrics_match_batched_metrics():
+    # The plain-Python single-game path must give the NumPy results, across episodes
+    scenarios = [generate_scenario(SCENARIO_PARAMS, seed) for seed in range(8)]
+    actions = np.random.default_rng(0).integers(-3, 5, (100, len(scenarios), 4))
+    batch = BatchSupplyChainEnvironment(
+        len(scenarios),
+        customer_demand=[scenario["customer_demand"] for scenario in scenarios],
+        lead_times=[scenario["lead_times"] for scenario in scenarios],
+        time_horizon=100,
+        metrics=StreamingMetrics(len(scenarios)),
+    )
+    for _ in range(2):
+        batch.reset()
+        for t in range(100):
+            batch.step(actions[t])
+    expected = batch.metrics.summary()
+
+    for i, scenario in enumerate(scenarios):
+        env = SupplyChainEnvironment(**scenario, metrics=StreamingMetrics())
+        for _ in range(2):
+            env.reset()
+            for t in range(100):
+                env.step(actions[t, i].tolist())
+        summary = env.metrics.summary()
+        assert summary["periods"] == expected["periods"]
+        for name, values in expected.items():
+            if name != "periods":
+                np.testing.assert_array_equal(summary[name][0], values[i], err_msg=name)
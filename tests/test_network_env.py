@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.environment.network_env import SupplyNetworkEnvironment
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2,
+    "time_horizon": 35,
+}
+
+
+def play_both(seed):
+    scenario = generate_scenario(SCENARIO_PARAMS, seed)
+    line = SupplyChainEnvironment(**scenario)
+    network = SupplyNetworkEnvironment.beer_game(**scenario)
+    line.reset()
+    network.reset()
+    rng = np.random.default_rng(seed)
+    done = False
+    while not done:
+        actions = rng.integers(-3, 5, 4)
+        state, _, done, info = line.step(actions.tolist())
+        network_state, _, _, network_info = network.step(actions)
+        assert network_state.tolist() == state, f"seed {seed}, period {line.current_time}"
+        assert network_info["period_cost"] == info["period_cost"]
+    assert network.total_cost == line.total_cost
+
+
+def test_beer_game_matches_line_env_on_random_actions():
+    # Negative adjustments can make orders negative, which both environments must ship alike
+    for seed in range(200):
+        play_both(seed)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from src.agents.ga_based import GABasedPolicy
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.evaluation import evaluate_scenarios
+from src.utils.result_cache import EvaluationCache
+from src.utils.sweep import generate_scenario
+
+SCENARIO_PARAMS = {
+    "demand": "poisson",
+    "demand_mean": 10,
+    "lead_time_range": (0, 4),
+    "holding_cost": 1,
+    "backlog_cost": 2.5,
+    "time_horizon": 30,
+}
+
+
+def test_cache_keeps_fields_and_evicts_beyond_max_entries(tmp_path):
+    cache = EvaluationCache(str(tmp_path / "cache.db"), max_entries=25)
+    policy = GABasedPolicy(SupplyChainEnvironment())
+    scenarios = [generate_scenario(SCENARIO_PARAMS, seed) for seed in range(20)]
+    expected = evaluate_scenarios(policy, scenarios, record=True, metrics=True)
+
+    cache.evaluate_scenarios(policy, scenarios, metrics=True)
+    recorded = cache.evaluate_scenarios(policy, scenarios, record=True)
+    assert cache.misses == 40 and cache.hits == 0
+    # KPIs stored by the first call survive the rewrite that adds the histories
+    both = cache.evaluate_scenarios(policy, scenarios, record=True, metrics=True)
+    assert cache.hits == 20
+    np.testing.assert_array_equal(recorded["period_costs"], expected["period_costs"])
+    np.testing.assert_array_equal(both["fill_rate"], expected["fill_rate"])
+
+    cache.evaluate_scenarios(policy, scenarios[-5:])
+    cache.evaluate_scenarios(policy, [generate_scenario(SCENARIO_PARAMS, seed) for seed in range(20, 40)])
+    assert cache.stats()["entries"] == 25
+    # The least recently used scenarios were evicted, the ones read back last are kept
+    cache.evaluate_scenarios(policy, scenarios[-5:])
+    assert cache.hits == 30
+    cache.evaluate_scenarios(policy, scenarios[:1])
+    assert cache.misses == 61
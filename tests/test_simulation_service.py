@@ -0,0 +1,21 @@
+import asyncio
+
+from src.agents.ga_based import GABasedPolicy
+from src.environment.supply_chain_env import SupplyChainEnvironment
+from src.utils.simulation_service import SimulationService
+
+
+def test_malformed_scenario_only_fails_its_own_request():
+    service = SimulationService({"ga": GABasedPolicy(SupplyChainEnvironment())}, workers=0)
+    valid = {"customer_demand": [5, 8, 3, 9, 4, 7, 6, 2, 10, 5], "lead_times": [1] * 10}
+    malformed = {"customer_demand": [5] * 10, "lead_times": [1] * 4}
+
+    async def query():
+        return await asyncio.gather(
+            service.evaluate("ga", valid), service.evaluate("ga", malformed), return_exceptions=True
+        )
+
+    result, error = asyncio.run(query())
+    expected, _ = GABasedPolicy(SupplyChainEnvironment(**valid, time_horizon=10)).evaluate()
+    assert result["total_cost"] == expected
+    assert isinstance(error, ValueError)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from src.environment.sources import FileReplaySource, MemmapSource
+from src.environment.supply_chain_env import SupplyChainEnvironment
+
+DEMAND = [4, 7, 0, 12, 5, 9, 3, 8, 6, 10]
+
+
+def replay_sources(tmp_path):
+    path = tmp_path / "demand.txt"
+    path.write_text(" ".join(map(str, DEMAND[:4])) + "\n" + ",".join(map(str, DEMAND[4:])) + "\n")
+    return [FileReplaySource(str(path), loop=False), MemmapSource(np.array(DEMAND), loop=False)]
+
+
+@pytest.mark.parametrize("index", [0, 1], ids=["file", "memmap"])
+def test_replay_shorter_than_chunk_size_without_loop(tmp_path, index):
+    with replay_sources(tmp_path)[index] as source:
+        env = SupplyChainEnvironment(customer_demand=source, time_horizon=len(DEMAND))
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step([0, 0, 0, 0])
+        assert env.current_time == len(DEMAND)
+        assert source[:len(DEMAND)] == DEMAND
+
+        source.reset()
+        assert [source.next() for _ in DEMAND] == DEMAND
+        with pytest.raises(IndexError):
+            source.next()